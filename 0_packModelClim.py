@@ -0,0 +1,51 @@
+#!/nwpr/gfs/com120/.conda/envs/rd/bin/python
+'''
+SYNTAX
+    ./0_packModelClim.py
+
+---- ---- ---- ----
+One-time setup (run again only if the model clim files are replaced).
+
+The script packs the 3harm model clim files (366 days x 2 variables,
+global 2p5) into a single store cropped to the BSISO domain,
+    data/clim_mod/modelClim_bsiso.npy (+ .json for the metadata)
+so 2_nc2ascii.py reads the model clim by indexing the memory mapped store
+instead of opening a file for every init date.
+
+2_nc2ascii.py falls back to the original files if the store doesn't exist,
+or if any of its source files is changed after packing.
+'''
+import tools.timetools as tt
+import tools.climtools as clt
+import numpy as np
+import logging
+
+
+def main():
+    #
+    # ---- settings
+    VARNAMES = ['u850', 'olr']
+    LONW, LONE = 40, 160
+    LATS, LATN = -10, 40
+    STOREPATH = 'data/clim_mod/modelClim_bsiso'  # + .npy / .json
+
+    def getModelClimPath(initTime, varName):  # same as 2_nc2ascii.py
+        return tt.float2format(
+            initTime, f'data/clim_mod/{varName}/global_daily_2p5_{varName}_%m%d_1991_2020_3harm.nc'
+        )
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+        datefmt='%Y-%m-%d %H:%M:%S',
+    )
+    logging.info(f'packing the model clim of {VARNAMES=} to {STOREPATH}')
+    clt.pack(
+        STOREPATH, VARNAMES, getModelClimPath,
+        [[-np.inf, np.inf], [LATS, LATN], [LONW, LONE]],
+    )
+    logging.info('normal exit')
+
+
+if __name__ == '__main__':
+    main()
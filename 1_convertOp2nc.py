@@ -2,10 +2,18 @@
 '''
 SYNTAX
     ./1_convertOp2nc.py [YYYYMMDD (reference date)]
+    ./1_convertOp2nc.py --watch
 
 If the reference date (T) is not sepecified,
 the default reference is today.
 
+The watch mode keeps running and polls the src dir of [T-1] (T = today)
+by os.stat, with the interval doubled (WATCHMININTERVAL to WATCHMAXINTERVAL)
+while nothing changes. Once all the daily grib2 files (or tar members)
+of the leads are found and unchanged since the previous poll,
+it runs "1_convertOp2nc.py T" and then "2_nc2ascii.py T"
+(retried on the next polls if it fails, up to WATCHMAXATTEMPTS times).
+
 ---- ---- ---- ----
 The script converts the operational CFSv2 data to nc files
 for APCC BSISO purpose.
@@ -18,19 +26,41 @@ for APCC BSISO purpose.
 For automation, the script can be executed everyday.
 The already completed files will be skipped.
 
+For backfilling many inits, set NUMWORKERS > 1 to convert the inits
+in parallel. The workers are (forked) processes, each init works in
+its own tmp dir (TMPDIR/yymmdd) and writes its own daymean files,
+so they scale with the cores until the src disk is the bottleneck.
+The log messages of an init are written together when it is finished.
+
 Steps (see the "main loop" part):
     0- check if the file needs update or is completed
-    1- get the grib2 files from op data to TMPDIR, either untar or make links
-    2- extract the variable and merge valid dates to a single file
-    3- convert to nc file
+    1- locate the daily grib2 data in op data, either the grib2 files or
+       the members inside the monthly tar files (only the header is indexed,
+       the needed members are read straight from the tar files)
+    2- extract the variables and merge valid dates to a single file per variable
+       (each daily grib2 file is scanned once for all variables,
+        by tools.gribtools or by wgrib2 if USEWGRIB2)
+    3- decode the merged grib2 by tools.gribtools (by cdo only for the packings
+       it doesn't support, e.g., JPEG2000), regrid to the domain
+       by tools.caltools.regridBilinear, and write the nc file
 '''
 import tools.timetools as tt
 import tools.nctools as nct
+import tools.gribtools as gt
+import tools.tartools as tart
+import tools.manifesttools as mft
+import tools.caltools as ct
+import numpy as np
 import shutil
+import tarfile
 import os
 import subprocess
 import logging
+import multiprocessing
+import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 
 def main():
@@ -41,10 +71,12 @@ def main():
         print('SYNTAX:')
         print('./1_convertOp2nc.py')
         print('./1_convertOp2nc.py YYYYMMDD')
+        print('./1_convertOp2nc.py --watch')
 
     inargs = sys.argv
-    if len(inargs) == 1:
-        REFDATE = tt.today()
+    ISWATCHMODE = inargs[1:] == ['--watch']
+    if len(inargs) == 1 or ISWATCHMODE:
+        REFDATE = tt.today()  # updated every poll in the watch mode
 
     elif len(inargs) == 2:
         arg = inargs[1]
@@ -69,6 +101,9 @@ def main():
     NUMLEADS = 45
     NUMINITS = 121 # forecast: T-1 to T-3, analysis: T-2 to T-121 -> all: T-1 to T-121
     CLEANTMPDIR = True # auto delete the tmpdir, set to False for debug
+    USEWGRIB2 = False # True: extract the records by wgrib2 instead of tools.gribtools
+    TARCACHEQUOTA = 10 * 1024**3 # bytes, for keeping the extracted tar members (USEWGRIB2) in a run
+    NUMWORKERS = 1 # number of processes converting inits in parallel, >1 for backfilling (e.g., after an outage)
     VARNAMES = ['u850', 'olr']
     VARIABLES = {
         'u850': {
@@ -80,14 +115,19 @@ def main():
             'cdoVarName': 'param4.5.0',
         }
     }
-    CDOGRIDOPTION = '-sellonlatbox,40,160,-10,40 -remapbil,r144x73'
+    REGRIDLONS = np.r_[40:160+2.5:2.5] # the domain on the 2.5 deg grid (as cdo remapbil,r144x73)
+    REGRIDLATS = np.r_[-10:40+2.5:2.5]
+    NCCOMPLEVEL = 1 # zlib level of the daymean files (0: uncompressed), see benchmarks/benchNcCompression.py
+    NCCHUNKSIZES = None # chunk sizes of (time, lat, lon), None for the netCDF default
     RUNID = tt.float2format(tt.now(), '%y%m%d_%H%M%S') # can be set to 'test' for debug
+    # -- watch mode settings
+    WATCHMININTERVAL = 60  # seconds between the polls, while the src files are changing
+    WATCHMAXINTERVAL = 15 * 60  # seconds, the longest interval (doubled from min while nothing changes)
+    WATCHMAXATTEMPTS = 4  # runs of 2_nc2ascii.py for a reference date, one per poll, until it succeeds
 
     # -- bin paths
     WGRIB2 = '/usr/bin/wgrib2'
     CDO = '/nwpr/gfs/com120/.conda/envs/rd/bin/cdo'
-    NCRENAME = '/usr/bin/ncrename'
-    TAR = '/usr/bin/tar'
 
     # -- file paths
     RUNDIR = '.'
@@ -96,6 +136,7 @@ def main():
 
     SRCROOT = f'{RUNDIR}/data/op_src'
     DESROOT = f'{RUNDIR}/data/daymean'
+    MANIFEST = f'{DESROOT}/manifest.json'  # status of the daymean files for checkOutput
 
     def getSrcDir(initTime):
         return tt.float2format(initTime, f'{SRCROOT}/%Y%m%d00/POST/OUTPUT/GFS/dm')
@@ -109,6 +150,9 @@ def main():
     def getDesPath(initTime, varName):
         return tt.float2format(initTime, f'{DESROOT}/%Y/%y%m%d_{varName}.nc')
 
+    def getTmpDir(initTime):  # each init works in its own tmp dir
+        return tt.float2format(initTime, f'{TMPDIR}/%y%m%d')
+
     # ---- don't trigger the path check error in test run
     if RUNID == 'test':
         if os.path.exists(TMPDIR):
@@ -141,26 +185,18 @@ def main():
     )
 
     #
-    # ---- check bin paths
-    returnCode, __ = runCommand(f'{WGRIB2} --version')
-    if returnCode != 8:  # wgrib2 returns 8 in version checking...
-        logging.fatal(f'wgrib2 not found: {WGRIB2=}')
-        return
-
-    returnCode, __ = runCommand(f'{CDO} --version')
-    if returnCode != 0:
-        logging.fatal(f'cdo not found: {CDO=}')
-        return
-
-    returnCode, __ = runCommand(f'{TAR} --version')
-    if returnCode != 0:
-        logging.fatal(f'tar not found: {TAR=}')
-        return
+    # ---- check bin paths (called only if there is something to convert)
+    def checkBinaries():
+        if USEWGRIB2:
+            returnCode, __ = runCommand(f'{WGRIB2} --version')
+            if returnCode != 8:  # wgrib2 returns 8 in version checking...
+                logging.fatal(f'wgrib2 not found: {WGRIB2=}')
+                return False
 
-    returnCode, __ = runCommand(f'{NCRENAME} --version')
-    if returnCode != 0:
-        logging.fatal(f'ncrename not found: {NCRENAME=}')
-        return
+        returnCode, __ = runCommand(f'{CDO} --version')
+        if returnCode != 0:  # only used for the packings not decoded by tools.gribtools
+            logging.warning(f'cdo not found: {CDO=}')
+        return True
 
     #
     # ---- initialization
@@ -168,18 +204,26 @@ def main():
     logging.info(f'  {RUNID=}')
     logging.info(f'  {NUMINITS=}')
     logging.info(f'  {NUMLEADS=}')
+    logging.info(f'  {NUMWORKERS=}')
     logging.info(f'  REFDATE (T) ={tt.float2format(REFDATE)}')
 
     #
-    # ---- organize the grib2 files from source to TMPDIR (grb2 -> grb2)
-    def getTmpGrib2(initTime):
+    # ---- the tar indices and extracted members are shared by the inits in the run
+    tarCache = tart.TarCache(f'{TMPDIR}/tarcache', TARCACHEQUOTA)
+
+    #
+    # ---- locate the daily grib2 data of each lead in the source (grb2 -> grb2)
+    # returns the sources = {validTime: (path, start, length)},
+    # where the grib2 data is path[start:start+length] (length=None for the whole file)
+    def getGrib2Sources(initTime, tmpDir, log):
         #
         # ---- setup
-        logging.info(f'  getting grib2 files from src to TMPDIR')
+        log.info(f'  locating grib2 data from src')
         srcDir = getSrcDir(initTime)
-        if os.path.exists(TMPDIR):
-            shutil.rmtree(TMPDIR)
-        os.mkdir(TMPDIR)
+        if os.path.exists(tmpDir):
+            shutil.rmtree(tmpDir)
+        os.makedirs(tmpDir)
+        validTimes = [initTime+iLead+1 for iLead in range(NUMLEADS)]
 
         #
         # ---- is the grib2 files not tarred yet?
@@ -187,122 +231,243 @@ def main():
         # but they are later tarred.
         # -> check we are processing from which state of the source files
         grib2SrcPaths = [
-            getGrib2SrcPath(srcDir, initTime+iLead+1) for iLead in range(NUMLEADS)
+            getGrib2SrcPath(srcDir, validTime) for validTime in validTimes
         ]
         allGrib2SrcFound = all([
             os.path.exists(path) for path in grib2SrcPaths
         ])
 
         #
-        # ---- not all found: untar files to TMPDIR / all found: make links to TMPDIR
-        if allGrib2SrcFound:  # make links
-            logging.info('  making links from the src grib2 to TMPDIR')
+        # ---- all found: read the src grib2 directly (or make links to tmpDir for wgrib2)
+        if allGrib2SrcFound:
+            if not USEWGRIB2:
+                return {
+                    validTime: (srcPath, 0, None)
+                    for validTime, srcPath in zip(validTimes, grib2SrcPaths)
+                }
+
+            log.info('  making links from the src grib2 to tmpDir')
             for srcPath in grib2SrcPaths:
-                # add "../../" for the relative path between the TMPDIR and SRCDIR
-                runCommand(f'ln -s ../../{srcPath} {TMPDIR}')
-        elif not allGrib2SrcFound:  # find tar files and untar them
-            logging.info('  trying locating the tar files')
-            tarredSrcPaths = [getTarredSrcPath(
-                srcDir, initTime+iLead+1) for iLead in range(NUMLEADS)]
-            tarredSrcPaths = list(set(tarredSrcPaths))  # remove duplicates
-            allTarredSrcFound = all([os.path.exists(path)
-                                    for path in tarredSrcPaths])
-
-            if not allTarredSrcFound:
-                logging.error(f'unable to locate all the src files')
-                return False  # for error
-
-            logging.info('  untarring files')
-            for path in tarredSrcPaths:
-                runCommand(f'{TAR} -xvf {path} -C {TMPDIR}')
-                logging.info(f' {TAR} -xvf {path} -C {TMPDIR}  ')
+                # use the relative path between the tmpDir and SRCDIR
+                runCommand(f'ln -s {os.path.relpath(srcPath, tmpDir)} {tmpDir}')
+
+            return {
+                validTime: (tt.float2format(validTime, f'{tmpDir}/%Y%m%d.grib2'), 0, None)
+                for validTime in validTimes
+            }
 
         #
-        # ---- check all grib2 files are located in (either linked or untarred to) the TMPDIR
-        for iLead in range(NUMLEADS):
-            path = tt.float2format(initTime+iLead+1, f'{TMPDIR}/%Y%m%d.grib2')
-            if not os.path.exists(path):
-                logging.error(f'unable to locate {path}')
-                return False  # for error
+        # ---- not all found: find the tar files and index their members
+        log.info('  trying locating the tar files')
+        tarredSrcPaths = [getTarredSrcPath(srcDir, validTime) for validTime in validTimes]
+        allTarredSrcFound = all([os.path.exists(path)
+                                for path in set(tarredSrcPaths)])
+
+        if not allTarredSrcFound:
+            log.error(f'unable to locate all the src files')
+            return None  # for error
+
+        log.info('  indexing tar files')
+        tarIndices = {}
+        for path in set(tarredSrcPaths):
+            try:
+                tarIndices[path] = tarCache.getIndex(path)
+            except (OSError, tarfile.TarError) as e:
+                log.error(f'unable to read {path}: {e}')
+                return None  # for error
+
+        sources = {}
+        for validTime, tarPath in zip(validTimes, tarredSrcPaths):
+            memberName = tt.float2format(validTime, '%Y%m%d.grib2')
+            if memberName not in tarIndices[tarPath]:
+                log.error(f'unable to locate {memberName} in {tarPath}')
+                return None  # for error
+            member = tarIndices[tarPath][memberName]
+            sources[validTime] = (tarPath, member['offset'], member['size'])
+
+        if not USEWGRIB2:  # stream from the tar files without extracting
+            return sources
 
-        return True  # for success
+        #
+        # ---- wgrib2 needs files: link the needed members (extracted once per run) to tmpDir
+        log.info('  extracting the needed members to tmpDir')
+        for validTime, tarPath in zip(validTimes, tarredSrcPaths):
+            memberName = tt.float2format(validTime, '%Y%m%d.grib2')
+            tarCache.linkMember(tarPath, memberName, f'{tmpDir}/{memberName}')
+
+        return {
+            validTime: (tt.float2format(validTime, f'{tmpDir}/%Y%m%d.grib2'), 0, None)
+            for validTime in validTimes
+        }
 
     #
-    # ---- merge variables from each valid dates to a single grib2 file and convert to nc
-    def extractVariable(initTime, varName):
+    # ---- merge variables from each valid dates to single grib2 files (one per variable)
+    def extractVariables(initTime, varNames, sources, tmpDir, log):
         #
         # ---- setup
-        logging.info(f'  {varName}: extracting and merging')
-        matcher = VARIABLES[varName]['grib2matcher']
-        mergedPath = f'{TMPDIR}/{varName}.grib2'
+        log.info(f'  {', '.join(varNames)}: extracting and merging')
+        matchers = {varName: VARIABLES[varName]['grib2matcher'] for varName in varNames}
+        mergedPaths = {varName: f'{tmpDir}/{varName}.grib2' for varName in varNames}
+        stats = {varName: True for varName in varNames}
 
-        if os.path.exists(mergedPath):
-            os.remove(mergedPath)
+        for mergedPath in mergedPaths.values():
+            if os.path.exists(mergedPath):
+                os.remove(mergedPath)
 
         #
-        # ---- merge records
+        # ---- merge records, scanning each daily file only once for all variables
         for iLead in range(NUMLEADS):
             validTime = initTime + iLead + 1
-            path = tt.float2format(validTime, f'{TMPDIR}/%Y%m%d.grib2')
-
-            #
-            # ---- get the record number
-            command = [*f"{WGRIB2} -ncpu 1 {path} -match".split(), matcher]
-            returnCode, result = runCommand(command, autoSplit=False)
-            if returnCode != 0:
-                logging.error(f'{returnCode=} for {command}, {result=}')
-                return False
-            # remove the empty string and warning message
-            recordNumbers = [message.split(':')[0]
-                             for message in result.split('\n')]
+            source = sources[validTime]
+            okVarNames = [varName for varName in varNames if stats[varName]]
+            if not okVarNames:
+                break
+
+            if USEWGRIB2:
+                leadStats = extractLeadByWgrib2(source[0], okVarNames, matchers, mergedPaths, log)
+            else:
+                leadStats = extractLeadByGribtools(source, okVarNames, matchers, mergedPaths, log)
+            stats.update(leadStats)
+
+        return stats
+
+    #
+    # ---- the records are located in python and copied byte by byte
+    def extractLeadByGribtools(source, varNames, matchers, mergedPaths, log):
+        stats = {varName: True for varName in varNames}
+        path, start, length = source
+
+        #
+        # ---- get the records of each variable
+        try:
+            records = gt.indexFile(
+                path, [matchers[varName] for varName in varNames], start, length
+            )
+        except (OSError, ValueError) as e:
+            log.error(f'unable to scan {path}: {e}')
+            return {varName: False for varName in varNames}
+
+        for varName in varNames:
+            numRecords = len(records[matchers[varName]])
+            if numRecords != 1:
+                log.error(
+                    f'{varName}: expecting 1 but found {numRecords} messages in {path}')
+                stats[varName] = False
+
+        #
+        # ---- merge data
+        okVarNames = [varName for varName in varNames if stats[varName]]
+        messages = gt.readRecords(
+            path, [records[matchers[varName]][0] for varName in okVarNames]
+        )
+        for varName, message in zip(okVarNames, messages):
+            with open(mergedPaths[varName], 'ab') as f:
+                f.write(message)
+
+        return stats
+
+    #
+    # ---- wgrib2 prints the match inventory and writes the matched records of each variable
+    def extractLeadByWgrib2(path, varNames, matchers, mergedPaths, log):
+        command = [*f"{WGRIB2} -ncpu 1 {path} -match_inv".split()]
+        for varName in varNames:
+            command += [
+                '-if', matchers[varName],
+                '-append', '-grib_out', mergedPaths[varName], '-fi',
+            ]
+        returnCode, result = runCommand(command, autoSplit=False)
+        if returnCode != 0:
+            log.error(f'{returnCode=} for {command}, {result=}')
+            return {varName: False for varName in varNames}
+
+        #
+        # ---- get the record numbers of each variable from the inventory
+        # remove the empty string and warning message
+        stats = {varName: True for varName in varNames}
+        inventory = [
+            message for message in result.split('\n')
+            if message.split(':')[0] not in ['Warning', '']
+        ]
+        for varName in varNames:
             recordNumbers = [
-                num for num in recordNumbers if num not in ['Warning', '']]
+                message.split(':')[0] for message in inventory
+                if re.search(matchers[varName], message)
+            ]
             if len(recordNumbers) != 1:
-                logging.error(
-                    f'expecting 1 but found {len(recordNumbers)} messages in {path}')
-                return False
+                log.error(
+                    f'{varName}: expecting 1 but found {len(recordNumbers)} messages in {path}')
+                stats[varName] = False
 
-            #
-            # ---- merge data
-            command = [
-                *f"{WGRIB2} -ncpu 1 {path} -match".split(), matcher,
-                '-append', '-grib_out', mergedPath,
-            ]
-            returnCode, result = runCommand(command, autoSplit=False)
-            if returnCode != 0:
-                logging.error(f'{returnCode=} for {command}, {result=}')
-                return False
+        return stats
 
-        return True
+    #
+    # ---- decode grib2 by cdo, for the packings not decoded by tools.gribtools (e.g., JPEG2000)
+    def decodeByCdo(varName, tmpDir, log):
+        srcPath = f'{tmpDir}/{varName}.grib2'
+        globalPath = f'{tmpDir}/{varName}_global.nc'
+        cdoVarName = VARIABLES[varName]['cdoVarName']
+
+        command = f'{CDO} -f nc4 --reduce_dim copy {srcPath} {globalPath}'
+        returnCode, result = runCommand(command)
+        if returnCode != 0:
+            log.error(f'{returnCode=} for {command}, {result=}')
+            return None, None, None
+
+        latName, lonName = nct.getDimNames(globalPath, cdoVarName)[-2:]
+        srcLat = nct.read(globalPath, latName)
+        srcLon = nct.read(globalPath, lonName)
+        data = nct.ncread(globalPath, cdoVarName)
+        data = np.reshape(data, (-1, *data.shape[-2:]))  # (time, lat, lon)
+        return data, srcLat, srcLon
 
     #
-    # ---- regrid, cut domain, and convert to nc, then ncrename
-    def merged2nc(initTime, varName):
+    # ---- decode the merged grib2, regrid to the domain (python), and write with the time axis
+    def merged2nc(initTime, varName, tmpDir, log):
         #
         # ---- setup
-        logging.info(f'  {varName}: converting to nc')
-        logging.info(f'  {TMPDIR}/{varName}.grib2 ')
-        srcPath = f'{TMPDIR}/{varName}.grib2'
+        log.info(f'  {varName}: converting to nc')
+        log.info(f'  {tmpDir}/{varName}.grib2 ')
+        srcPath = f'{tmpDir}/{varName}.grib2'
         desPath = getDesPath(initTime, varName)
-        cdoVarName = VARIABLES[varName]['cdoVarName']
 
         if not os.path.exists(os.path.dirname(desPath)):
             os.system(f'mkdir -p {os.path.dirname(desPath)}')
 
         #
-        # ---- do it
-        command = f'{CDO} -f nc4 -z zip9 --reduce_dim'
-        command += f' -settaxis,{tt.float2format(initTime+1, '%Y%m%d,%H%M%S')},1day'
-        command += f' -chname,{cdoVarName},{varName}'
-        command += f' {CDOGRIDOPTION}'
-        command += f' {srcPath} {desPath}'
-        returnCode, result = runCommand(command)
-        if returnCode != 0:
-            logging.error(f'{returnCode=} for {command}, {result=}')
-            return False
+        # ---- decode the fields of all the leads, (time, lat, lon) on the global grid
+        try:
+            data, srcLat, srcLon = gt.readFields(srcPath)
+        except ValueError as e:
+            log.info(f'  {varName}: {e}, decoding by cdo')
+            data, srcLat, srcLon = decodeByCdo(varName, tmpDir, log)
+            if data is None:
+                return False
+
+        #
+        # ---- bilinear regridding, only for the points in the domain
+        # (the same scheme as cdo remapbil, see benchmarks/benchRegrid.py)
+        data = ct.regridBilinear(data, srcLon, srcLat, REGRIDLONS, REGRIDLATS)
+
+        #
+        # ---- write (time, lat, lon) with the time axis, then move it to desPath
+        # (the checks only see complete files)
+        tmpPath = f'{desPath}.tmp'
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        nct.save(tmpPath, {
+            varName: data,
+            'time': initTime + 1 + np.arange(data.shape[0]),  # days since 2000-01-01
+            'lat': REGRIDLATS,
+            'lon': REGRIDLONS,
+        }, overwrite=True, complevel=NCCOMPLEVEL, chunksizes=NCCHUNKSIZES)
+        os.replace(tmpPath, desPath)
 
         return True
 
+    #
+    # ---- the status of the daymean files from the previous checks
+    manifest = mft.load(MANIFEST)
+
     #
     # ---- check output
     def checkOutput(initTime, varName):
@@ -320,8 +485,15 @@ def main():
             return isCompleted, reason
 
         #
-        # ---- check varName
-        if varName not in nct.getVarNames(path):
+        # ---- check varName (the file is opened only if it is changed since the last check)
+        try:
+            variables = mft.getOrUpdateEntry(manifest, path)['variables']
+        except (OSError, RuntimeError) as e:  # e.g., broken file
+            isCompleted = False
+            reason = f'unreadable file ({e})'
+            reason += f' {path} '
+            return isCompleted, reason
+        if varName not in variables:
             isCompleted = False
             reason = 'varName not found'
             reason += f' {path} '
@@ -329,64 +501,226 @@ def main():
 
         #
         # ---- check lead lengths
-        numLeads = nct.getVarShape(path, varName)[0]
+        numLeads = variables[varName][0]
         if numLeads < NUMLEADS:
             isCompleted = False
             reason = f'{numLeads=} (<{NUMLEADS})'
 
         return isCompleted, reason
 
-    # ------------------- #
-    # ---- main loop ---- #
-    # ------------------- #
-    for iInit in range(NUMINITS):
-        #
-        # ---- initial setup
-        initTime = REFDATE - (iInit + 1)
-        logging.info(f'T-{REFDATE-initTime} ({tt.float2format(initTime)})')
+    #
+    # ---- check file completeness of an init
+    def checkInit(initTime, log):
+        log.info(f'T-{REFDATE-initTime} ({tt.float2format(initTime)})')
 
-        #
-        # ---- check file completeness, skip if completed
         outputStats = [checkOutput(initTime, varName) for varName in VARNAMES]
         areCompleted = [outputStat[0] for outputStat in outputStats]
         reasons = [outputStat[1] for outputStat in outputStats]
 
         if all(areCompleted):
-            logging.info('  skipped: all outputs are completed')
-            continue
+            log.info('  skipped: all outputs are completed')
         else:
-            logging.info(f'  updating: {
+            log.info(f'  updating: {
                 ', '.join([
                     f'{varName}-{reason}'
                     for varName, reason in zip(VARNAMES, reasons)
                     if reason != ''
                 ])
             }')
+        return areCompleted
 
-        #
-        # ---- run
-        stat = getTmpGrib2(initTime)
-        if not stat:
-            continue
+    #
+    # ---- convert an init in its own tmp dir (steps 1-3)
+    def convertInit(initTime, areCompleted, log):
+        tmpDir = getTmpDir(initTime)
+        try:
+            sources = getGrib2Sources(initTime, tmpDir, log)
+            if sources is None:
+                return
+
+            varNames = [
+                varName for varName, isCompleted in zip(VARNAMES, areCompleted)
+                if not isCompleted
+            ]
+            extractStats = extractVariables(initTime, varNames, sources, tmpDir, log)
 
-        for varName, isCompleted in zip(VARNAMES, areCompleted):
-            if isCompleted:
-                logging.info(f'  {varName}: skipping because completed')
-                continue
+            for varName, isCompleted in zip(VARNAMES, areCompleted):
+                if isCompleted:
+                    log.info(f'  {varName}: skipping because completed')
+                    continue
 
-            stat = extractVariable(initTime, varName)
-            if not stat:
-                continue
+                stat = extractStats[varName]
+                if not stat:
+                    continue
+
+                stat = merged2nc(initTime, varName, tmpDir, log)
+                if not stat:
+                    continue
+
+                log.info(f'  {varName}: finished')
 
-            stat = merged2nc(initTime, varName)
             if not stat:
+                return
+            log.info('  all finished')
+
+        finally:  # don't keep the grib2 of any init during backfilling, even if it failed
+            if CLEANTMPDIR:
+                shutil.rmtree(tmpDir, ignore_errors=True)
+
+    #
+    # ---- convert an init in a worker process,
+    # ---- return the log records and the manifest entries of the written files to the main process
+    def convertInitInWorker(initTime, areCompleted):
+        log = InitLog(buffered=True)
+        try:
+            convertInit(initTime, areCompleted, log)
+        except Exception as e:  # don't let one init kill the others
+            log.error(f'  unexpected error: {e!r}')
+
+        entries = {}
+        for varName, isCompleted in zip(VARNAMES, areCompleted):
+            path = getDesPath(initTime, varName)
+            if not isCompleted and os.path.exists(path):
+                try:
+                    mft.updateEntry(entries, path)
+                except (OSError, RuntimeError) as e:  # checked again by the summary
+                    log.error(f'  unable to read {path}: {e}')
+        return log.records, entries
+
+    #
+    # ---- watch mode: poll the src dir of [T-1] and run the steps once it's completed
+    def getSrcSignature(initTime):  # (name, size, mtime) of the src files, None if no src dir
+        try:
+            with os.scandir(getSrcDir(initTime)) as entries:
+                return sorted([
+                    (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                    for entry in entries if entry.is_file()
+                ])
+        except FileNotFoundError:
+            return None
+
+    def srcIsComplete(initTime):  # the same locating rules as getGrib2Sources
+        srcDir = getSrcDir(initTime)
+        validTimes = [initTime+iLead+1 for iLead in range(NUMLEADS)]
+        if all([os.path.exists(getGrib2SrcPath(srcDir, validTime)) for validTime in validTimes]):
+            return True
+        try:
+            return all([
+                tt.float2format(validTime, '%Y%m%d.grib2')
+                in tarCache.getIndex(getTarredSrcPath(srcDir, validTime))
+                for validTime in validTimes
+            ])
+        except (OSError, tarfile.TarError):  # not found, or still being written
+            return False
+
+    def runStep(script, refDate):
+        command = [sys.executable, f'{os.path.dirname(os.path.abspath(__file__))}/{script}',
+                   tt.float2format(refDate)]
+        logging.info(f'running {' '.join(command)}')
+        returnCode = subprocess.run(command, cwd=RUNDIR, stdout=subprocess.DEVNULL).returncode
+        logging.info(f'  {returnCode=}')
+        return returnCode
+
+    def watch():
+        interval = WATCHMININTERVAL
+        lastSignature, triedSignature = None, None
+        chainAttempts = {}  # refDate: runs of 2_nc2ascii.py, None once succeeded
+        while True:
+            refDate = tt.today()
+            initTime = refDate - 1
+            manifest.update(mft.load(MANIFEST))  # updated by the conversion runs
+            signature = getSrcSignature(initTime)
+
+            if all([checkOutput(initTime, varName)[0] for varName in VARNAMES]):
+                # converted, create the output once, and wait for the next init
+                numAttempts = chainAttempts.get(refDate, 0)
+                if numAttempts is not None and numAttempts < WATCHMAXATTEMPTS:
+                    if runStep('2_nc2ascii.py', refDate) == 0:
+                        chainAttempts[refDate] = None
+                    else:  # retried on the next poll
+                        chainAttempts[refDate] = numAttempts + 1
+                        if chainAttempts[refDate] == WATCHMAXATTEMPTS:
+                            logging.warning(f'  2_nc2ascii.py failed {WATCHMAXATTEMPTS} times, '
+                                            f'not retried for {tt.float2format(refDate)}')
+                interval = WATCHMAXINTERVAL
+
+            elif signature is not None and signature == lastSignature \
+                    and signature != triedSignature and srcIsComplete(initTime):
+                # landed and unchanged for a poll, convert and poll again right away
+                logging.info(f'src completed: init={tt.float2format(initTime)}')
+                runStep('1_convertOp2nc.py', refDate)
+                triedSignature = signature  # not again until the src is changed
+                interval = 0
+
+            elif signature != lastSignature:  # still landing
+                interval = WATCHMININTERVAL
+            else:
+                interval = min(max(interval * 2, WATCHMININTERVAL), WATCHMAXINTERVAL)
+
+            lastSignature = signature
+            time.sleep(interval)
+
+    # ------------------- #
+    # ---- main loop ---- #
+    # ------------------- #
+    if ISWATCHMODE:
+        logging.info(f'watching the src dir of [T-1], {WATCHMININTERVAL=}, {WATCHMAXINTERVAL=}')
+        try:
+            watch()
+        except KeyboardInterrupt:
+            logging.info('stopped')
+        return
+
+    initTimes = [REFDATE - (iInit + 1) for iInit in range(NUMINITS)]
+
+    if NUMWORKERS <= 1:  # serial
+        binariesChecked = False
+        for initTime in initTimes:
+            log = InitLog()
+            areCompleted = checkInit(initTime, log)
+            if all(areCompleted):
+                continue
+            if not binariesChecked:
+                if not checkBinaries():
+                    return
+                binariesChecked = True
+            convertInit(initTime, areCompleted, log)
+
+    else:  # parallel, the logs of each init are kept together
+        # the checks read nc files, keep them in the main thread
+        jobs = []
+        for initTime in initTimes:
+            log = InitLog(buffered=True)
+            areCompleted = checkInit(initTime, log)
+            if all(areCompleted):
+                log.flush()
                 continue
+            jobs.append((initTime, areCompleted, log))
 
-            logging.info(f'  {varName}: finished')
+        if jobs and not checkBinaries():
+            return
 
-        if not stat:
-            continue
-        logging.info('  all finished')
+        logging.info(f'converting {len(jobs)} inits with {NUMWORKERS} workers')
+        # the inits are independent (own tmp dir and daymean files), so the grib2 decoding,
+        # the regridding, and the nc writing run in parallel processes without any lock;
+        # forked, since the closures of main() can't be pickled
+        global _workerTask
+        _workerTask = convertInitInWorker
+        with ProcessPoolExecutor(
+            max_workers=NUMWORKERS, mp_context=multiprocessing.get_context('fork')
+        ) as executor:
+            futures = [
+                executor.submit(_runWorkerTask, initTime, areCompleted)
+                for initTime, areCompleted, __ in jobs
+            ]
+            for (initTime, __, log), future in zip(jobs, futures):
+                try:
+                    records, entries = future.result()
+                    log.records.extend(records)
+                    manifest.update(entries)  # not opened again by the summary
+                except Exception as e:  # e.g., the worker process was killed
+                    log.error(f'  unexpected error in the worker: {e!r}')
+                log.flush()
 
     #
     # ---- get output file status summary
@@ -406,6 +740,8 @@ def main():
     else:
         logging.info(f'summary - all outputs are completed')
 
+    mft.save(manifest, MANIFEST)
+
     #
     # ---- clean up
     if os.path.exists(TMPDIR) and CLEANTMPDIR:
@@ -416,6 +752,48 @@ def main():
     logging.info('normal exit')
 
 
+_workerTask = None  # set by main() before forking the workers, see _runWorkerTask
+
+
+def _runWorkerTask(*args):  # the pickled task, runs the closure inherited by the forked worker
+    return _workerTask(*args)
+
+
+class InitLog:
+    '''
+    logger for the messages of an init
+
+    buffered=False: pass the messages to logging directly
+    buffered=True: hold the messages (with their time) until flush(),
+                   so parallel inits don't interleave in the log file
+                   (the records of a worker process are flushed by the main process)
+    '''
+
+    def __init__(self, buffered=False):
+        self.buffered = buffered
+        self.records = []
+
+    def log(self, level, message):
+        logger = logging.getLogger()
+        if not self.buffered:
+            logger.log(level, message)
+            return
+        if logger.isEnabledFor(level):
+            self.records.append(logger.makeRecord(
+                logger.name, level, '(unknown file)', 0, message, None, None
+            ))
+
+    def debug(self, message): self.log(logging.DEBUG, message)
+    def info(self, message): self.log(logging.INFO, message)
+    def warning(self, message): self.log(logging.WARNING, message)
+    def error(self, message): self.log(logging.ERROR, message)
+
+    def flush(self):
+        for record in self.records:
+            logging.getLogger().handle(record)
+        self.records = []
+
+
 def runCommand(command, autoSplit=True):
     if autoSplit:
         command = command.split()
@@ -8,11 +8,25 @@ Version
 ____
 SYNTAX
     ./2_nc2ascii.py [YYYYMMDD (reference date)]
+    ./2_nc2ascii.py --start YYYYMMDD --end YYYYMMDD [--workers N]
+    ./2_nc2ascii.py --serve
+    ./2_nc2ascii.py --request YYYYMMDD
 
 ----
 If the reference date (T) is not sepecified,
 the default reference is today.
 
+The range mode (--start/--end) is for reprocessing many reference dates
+in one run. The loaded inputs (open files, analysis rows, clims) are shared
+by the consecutive dates, and the dates can be split into N continuous
+chunks for N worker processes. Each date has its own log file
+(logs/nc2ascii.{RUN_ID}.YYYYMMDD) and warning file as in the normal mode.
+
+The service mode (--serve) keeps running with the inputs in memory
+and listens on the Unix socket SOCKETPATH (tmps/nc2ascii.sock).
+--request asks the running service for the output of a reference date,
+which is created as in the range mode (log file of each date included).
+
 The script converts the CFSv2 forecast data for APCC BSISO in ascii format.
     variables: u850, olr
     domain: 40-160E, 10S-40N
@@ -25,18 +39,34 @@ Steps (see the "pre-checking" part and the "run" function):
     0- [pre-check] check the data file status and determine the init dates to use
     1- [run] analysis - read: obs clim, model clim, model raw
                       - bias_correction = model_raw - (model_clim + obs_clim)
+                      - the rows unchanged since the last run are taken from
+                        data/cache/analysis_{var}.npz instead
     2- [run] forecast - same as analysis but with 3 inits
     3- [run] write output 
 '''
 import tools.timetools as tt
 import tools.nctools as nct
+import tools.climtools as clt
+import tools.asciitools as at
 import numpy as np
 import logging
 import os
 import sys
+import time
+import socket
+import socketserver
+import signal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 
-def main():
+def nc2ascii(REFDATE: int, RUN_ID: str, shared: dict) -> str:
+    '''
+    create the output of REFDATE,
+    return the warnType of the post-check (None, 'degraded', or 'error')
+
+    shared (e.g., the cached analysis rows) is kept across the REFDATEs in a process
+    '''
     def postCheck():
         # ---- mark the log file for warning
         # ---- and make another warning file in the run path
@@ -61,7 +91,7 @@ def main():
                     logging.info(f'  removing the warning message-{wt}')
                     os.remove(warnFileName(wt))
             logging.info('normal exit')
-            return
+            return warnType
 
         # if warnType
         logging.info(f'  creating the warning message')
@@ -70,36 +100,9 @@ def main():
 
         logging.info(f'normal exit (log file marked)')
         os.system(f'mv {LOGFILE} {LOGFILE}-{warnType}')
+        return warnType
 
 
-    def printUsage():
-        print('ERROR: unrecognized input arguments')
-        print('SYNTAX:')
-        print('./2_nc2ascii.py')
-        print('./2_nc2ascii.py YYYYMMDD')
-
-    #
-    # ---- inputs
-    inargs = sys.argv
-    if len(inargs) == 1:
-        REFDATE = tt.today()
-
-    elif len(inargs) == 2:
-        arg = inargs[1]
-
-        # make sure the input is numerical
-        if len(arg) != 8:
-            printUsage()
-            return
-        if not all([char in '0123456789' for char in arg]):
-            printUsage()
-            return
-
-        REFDATE = int(tt.format2float(arg, '%Y%m%d'))
-    else:
-        printUsage()
-        return
-
     #
     # ---- settings
     # -- run settings
@@ -112,7 +115,6 @@ def main():
     NX, NY = 49, 21
     LONW, LONE = 40, 160
     LATS, LATN = -10, 40
-    RUN_ID = tt.float2format(tt.now(), '%y%m%d_%H%M%S')
 
     # tolerate: rooms for discontinued op output or other contingencies
     MAX_FORECAST_DELAY = 5  # forecast init delayed maximum to n (init=T-n)
@@ -129,17 +131,30 @@ def main():
     SRCDIR = f'{RUNDIR}/data/daymean'
     DESDIR = f'{RUNDIR}/data/output'
 
+    def formatPaths(initTime, fmt):  # a list of paths for a list of initTimes, formatted at once
+        if np.ndim(initTime):
+            return tt.float2formatArray(initTime, fmt).tolist()
+        return tt.float2format(initTime, fmt)
+
     def getDaymeanPath(initTime, varName):
-        return tt.float2format(initTime, f'{SRCDIR}/%Y/%y%m%d_{varName}.nc')
+        return formatPaths(initTime, f'{SRCDIR}/%Y/%y%m%d_{varName}.nc')
 
     def getModelClimPath(initTime, varName):
-        return tt.float2format(
+        return formatPaths(
             initTime, f'data/clim_mod/{varName}/global_daily_2p5_{varName}_%m%d_1991_2020_3harm.nc'
         )
 
+    MODELCLIMSTORE = 'data/clim_mod/modelClim_bsiso'  # packed by 0_packModelClim.py, optional
+
     def getObsClimPath(varName):
         return f'data/clim_obs/obs_{varName}_clim_2p5.nc'
 
+    def getObsClimCachePath(varName):  # cropped and 366 days, built by run()
+        return f'data/clim_obs/obs_{varName}_clim_2p5_bsiso366.npy'
+
+    def getAnalysisSidecarPath(varName, refDate):  # the analysis of the run of refDate, see run()
+        return tt.float2format(refDate, f'{RUNDIR}/data/cache/analysis_{varName}_%Y%m%d.npz')
+
     def getDesPath(varName):
         if varName == 'olr':
             varName2 = 'OLRA'
@@ -157,16 +172,11 @@ def main():
     # -----
 
     #
-    # ---- set up the logger
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s %(levelname)s %(message)s",
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[
-            logging.FileHandler(LOGFILE),  # output to the file
-            logging.StreamHandler()  # display in the terminal as well
-        ]
-    )
+    # ---- set up the logger: output to the file (removed by convertRefDates),
+    # ----                    and display in the terminal (set by main)
+    fileHandler = logging.FileHandler(LOGFILE)
+    fileHandler.setFormatter(LOGFORMATTER)
+    logging.getLogger().addHandler(fileHandler)
     logging.info(
         'beginning converting the nc file to ASCII format for APCC BISIO')
     logging.info(f'  {RUN_ID=}')
@@ -181,6 +191,16 @@ def main():
 
     isDegraded = False  # mark the log file name later
 
+    # the daymean paths of all the candidate inits of the analysis and forecast
+    candidateInitDates = list(range(
+        min(REFDATE + ANALYSIS_START - ANALYSIS_LEAD_MAX, REFDATE - MAX_FORECAST_DELAY), REFDATE
+    ))
+    daymeanPaths = {
+        (initTime, varName): path
+        for varName in VARNAMES
+        for initTime, path in zip(candidateInitDates, getDaymeanPath(candidateInitDates, varName))
+    }
+
     # make sure all the analysis files exist or is discontinued by only 2
     analysisInitDates, analysisValidDates, analysisLeads = [], [], []
     for delta in range(ANALYSIS_START, ANALYSIS_START+NUM_ANALYSIS):  # [T-119] to [T-1]
@@ -194,7 +214,7 @@ def main():
             if initTime == REFDATE - 1 and lead == 1:
                 continue # don't use [T-1] lead 1 for analysis (or would be the same as forecast)
 
-            paths = [getDaymeanPath(initTime, varName) for varName in VARNAMES]
+            paths = [daymeanPaths[initTime, varName] for varName in VARNAMES]
             anyMissing = any([not os.path.exists(path) for path in paths])
 
             if anyMissing:
@@ -215,15 +235,14 @@ def main():
             logging.error(
                 f'missing file: analysis, valid={tt.float2format(validDate)}, {ANALYSIS_LEAD_MAX=}'
             )
-            postCheck()
-            return  # fatal error
+            return postCheck()  # fatal error
 
     # find the acceptable forecast files from [T-1] to [T-n]
     numAcceptedForecasts, forecastInitDates = 0, []
     for delta in range(1, MAX_FORECAST_DELAY+1):  # [T-1], [T-2], ...
         initTime = REFDATE - delta
 
-        paths = [getDaymeanPath(initTime, varName) for varName in VARNAMES]
+        paths = [daymeanPaths[initTime, varName] for varName in VARNAMES]
         anyMissing = any([not os.path.exists(path) for path in paths])
 
         if anyMissing:  # unqualified
@@ -234,7 +253,7 @@ def main():
 
         # T-1 needs minNumLeads to be 41, T-2 needs 42, ... to align for the valids
         minNumLeads = NUM_LEADS + delta
-        fileNumLeads = [nct.getVarDimLength(path, varName, 0)
+        fileNumLeads = [nct.getFileInfo(path).getVarDimLength(varName, 0)
                         for path, varName in zip(paths, VARNAMES)]
 
         if any([lead < minNumLeads for lead in fileNumLeads]):  # unqualified
@@ -254,15 +273,53 @@ def main():
     paths = [getObsClimPath(varName) for varName in VARNAMES]
     if any([not os.path.exists(path) for path in paths]):
         logging.error('file missing: obs clim not found')
-        postCheck()
-        return  # fatal
+        return postCheck()  # fatal
     # check dim shape
-    shapes = [nct.getVarShape(path, varName)
+    shapes = [nct.getFileInfo(path).getVarShape(varName)
               for path, varName in zip(paths, VARNAMES)]
     if any([shape[0] != 365 or shape[1] < NY or shape[2] < NX for shape in shapes]):
         logging.error('wrong file dimension: obs clim')
-        postCheck()
-        return  # fatal
+        return postCheck()  # fatal
+
+    #
+    # ---- use the packed model clim if it's up to date, or read the files
+    def loadModelClimStore():
+        if not os.path.exists(f'{MODELCLIMSTORE}.json'):
+            return None
+        store = clt.ModelClimStore(MODELCLIMSTORE)
+        if any([varName not in store.varNames for varName in VARNAMES]) \
+                or [len(store.lats), store.lats[0], store.lats[-1]] != [NY, LATS, LATN] \
+                or [len(store.lons), store.lons[0], store.lons[-1]] != [NX, LONW, LONE]:
+            logging.info(f'  {MODELCLIMSTORE} does not match the settings, ignored')
+            return None
+        return store
+
+    try:  # loaded again if (re)packed, e.g., while serving
+        stat = os.stat(f'{MODELCLIMSTORE}.json')
+        storeStatKey = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        storeStatKey = None
+    if 'modelClimStore' not in shared or shared['modelClimStore'][0] != storeStatKey:
+        shared['modelClimStore'] = (storeStatKey, loadModelClimStore())
+    __, modelClimStore = shared['modelClimStore']
+    if modelClimStore is not None:
+        if modelClimStore.isUpToDate(analysisInitDates + forecastInitDates):
+            logging.info(f'  reading the model clim from {MODELCLIMSTORE}')
+        else:
+            logging.info(f'  {MODELCLIMSTORE} is not up to date, reading the model clim files')
+            modelClimStore = None
+
+    modelClimInitDates = analysisInitDates + forecastInitDates
+    modelClimPaths = {
+        (initTime, varName): path
+        for varName in VARNAMES
+        for initTime, path in zip(modelClimInitDates, getModelClimPath(modelClimInitDates, varName))
+    }
+
+    def getModelClimNumLeads(initTime, varName):
+        if modelClimStore is not None:
+            return len(modelClimStore.leads)
+        return nct.getFileInfo(modelClimPaths[initTime, varName]).getVarDimLength(varName, 0)
 
     #
     # ---- check the model clim files: for analysis
@@ -270,24 +327,22 @@ def main():
         f'{varName}_{tt.float2format(initTime, '%m%d')}'
         for initTime in analysisInitDates
         for varName in VARNAMES
-        if not os.path.exists(getModelClimPath(initTime, varName))
+        if not os.path.exists(modelClimPaths[initTime, varName])
     ]
     if notFoundFiles:
         logging.error(f'file missing: model clim {','.join(notFoundFiles)}')
-        postCheck()
-        return  # fatal
+        return postCheck()  # fatal
 
     leadTooShortFiles = [
         f'{varName}_{tt.float2format(initTime, '%m%d')}'
         for initTime in analysisInitDates
         for varName in VARNAMES
-        if nct.getVarDimLength(getModelClimPath(initTime, varName), varName, 0) < ANALYSIS_LEAD_MAX
+        if getModelClimNumLeads(initTime, varName) < ANALYSIS_LEAD_MAX
     ]
     if leadTooShortFiles:
         logging.error(
             f'lead too short: model clim {','.join(leadTooShortFiles)}')
-        postCheck()
-        return  # fatal
+        return postCheck()  # fatal
 
     #
     # ---- check the model clim files: for forecast
@@ -295,24 +350,22 @@ def main():
         f'{varName}_{tt.float2format(initTime, '%m%d')}'
         for initTime in forecastInitDates
         for varName in VARNAMES
-        if not os.path.exists(getModelClimPath(initTime, varName))
+        if not os.path.exists(modelClimPaths[initTime, varName])
     ]
     if notFoundFiles:
         logging.error(f'file missing: model clim {','.join(notFoundFiles)}')
-        postCheck()
-        return  # fatal
+        return postCheck()  # fatal
 
     leadTooShortFiles = [
         f'{varName}_{tt.float2format(initTime, '%m%d')}'
         for initTime in forecastInitDates
         for varName in VARNAMES
-        if nct.getVarDimLength(getModelClimPath(initTime, varName), varName, 0) < NUM_LEADS + MAX_FORECAST_DELAY
+        if getModelClimNumLeads(initTime, varName) < NUM_LEADS + MAX_FORECAST_DELAY
     ]
     if leadTooShortFiles:
         logging.error(
             f'lead too short: model clim {','.join(leadTooShortFiles)}')
-        postCheck()
-        return  # fatal
+        return postCheck()  # fatal
 
     if isDegraded:
         logging.warning('The output quality will be degraded.')
@@ -355,23 +408,85 @@ def main():
     # ------------- #
     # ---- run ---- #
     # ------------- #
+    def getStatKey(path):
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def loadAnalysisSidecar(varName):  # of REFDATE (rerun) or REFDATE-1 (the daily run), None if not found
+        for refDate in [REFDATE, REFDATE - 1]:
+            try:
+                with np.load(getAnalysisSidecarPath(varName, refDate)) as f:
+                    sidecar = {key: f[key] for key in ['analysis', 'keys', 'obsClimKey']}
+            except (OSError, ValueError, KeyError):
+                continue
+            if sidecar['analysis'].shape[1:] != (NY, NX) or len(sidecar['analysis']) != len(sidecar['keys']):
+                continue
+            return sidecar
+        return None
+
+    def saveAnalysisSidecar(varName, analysis, keys, obsClimKey):
+        path = getAnalysisSidecarPath(varName, REFDATE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmpName = f'{path}.{os.getpid()}.tmp'
+        with open(tmpName, 'wb') as f:
+            np.savez(f, analysis=analysis, keys=keys, obsClimKey=obsClimKey)
+        os.replace(tmpName, path)
+
+        # the runs of the other refDates (range mode, --serve, backfills) have their own sidecars,
+        # remove the ones older than REFDATE-1 (not needed by the run of REFDATE+1)
+        cacheDir, oldest = os.path.dirname(path), os.path.basename(getAnalysisSidecarPath(varName, REFDATE - 1))
+        prefix = f'analysis_{varName}_'
+        for name in os.listdir(cacheDir):
+            if name.startswith(prefix) and name.endswith('.npz') \
+                    and len(name) == len(oldest) and name < oldest:
+                try:
+                    os.remove(f'{cacheDir}/{name}')
+                except FileNotFoundError:  # removed by another run
+                    pass
+
     def run(varName):
         #
         # ---- read obs clim
         logging.info(f'  reading obs clim')
-        obsClim, __ = nct.ncreadByDimRange(
-            getObsClimPath(varName),
-            varName,
-            [[-np.inf, np.inf], [LATS, LATN], [LONW, LONE]],
-        )
-        i228 = tt.ymd2int(2001, 2, 28) - tt.ymd2int(2001, 1, 1)
-        i301 = tt.ymd2int(2001, 3, 1) - tt.ymd2int(2001, 1, 1)
-        obsClim = np.concatenate(  # 365 -> 366
-            (obsClim[:i228+1, :],
-             0.5 * (obsClim[i228, :]+obsClim[i301, :])[None, :, :],
-             obsClim[i301:, :]),
-            axis=0,
-        )
+        obsClimKey = np.array(getStatKey(getObsClimPath(varName)), dtype=np.int64)
+        obsClims = shared.setdefault('obsClims', {})  # varName: (obsClimKey, obsClim), kept in memory
+        if varName not in obsClims or not np.array_equal(obsClims[varName][0], obsClimKey):
+            obsClims[varName] = obsClimKey, clt.loadObsClim366(  # 365 -> 366, cached
+                getObsClimPath(varName),
+                varName,
+                [[-np.inf, np.inf], [LATS, LATN], [LONW, LONE]],
+                getObsClimCachePath(varName),
+            )
+        obsClim = obsClims[varName][1]
+
+        #
+        # ---- reuse the analysis rows of the previous run (sidecar) if their inputs are unchanged,
+        # ---- i.e., the same valid date, init date, lead, daymean file, model clim (file or store),
+        # ---- and obs clim
+        def getModelClimKey(initTime):
+            if modelClimStore is not None:  # the rows are read from the store (loaded with storeStatKey)
+                return shared['modelClimStore'][0]
+            return getStatKey(modelClimPaths[initTime, varName])
+
+        analysisKeys = np.array([
+            [validDate, initTime, lead,
+             *getStatKey(daymeanPaths[initTime, varName]),
+             *getModelClimKey(initTime)]
+            for validDate, initTime, lead in zip(analysisValidDates, analysisInitDates, analysisLeads)
+        ], dtype=np.int64)
+
+        analysis = np.nan * np.ones((NUM_ANALYSIS, NY, NX))
+        toDo = list(range(NUM_ANALYSIS))
+        sidecar = loadAnalysisSidecar(varName)
+        if sidecar is not None and np.array_equal(sidecar['obsClimKey'], obsClimKey):
+            iPrevious = {tuple(key): i for i, key in enumerate(sidecar['keys'].tolist())}
+            toDo = []
+            for iAnalysis, key in enumerate(analysisKeys.tolist()):
+                if tuple(key) in iPrevious:
+                    analysis[iAnalysis, :] = sidecar['analysis'][iPrevious[tuple(key)]]
+                else:
+                    toDo.append(iAnalysis)
+        logging.info(f'  analysis rows: {NUM_ANALYSIS - len(toDo)} reused, {len(toDo)} to calculate')
 
         #
         # ---- read analysis model clim
@@ -381,39 +496,51 @@ def main():
             [LATS, LATN],
             [LONW, LONE],
         ]
-        analysisModelClim = np.nan * np.ones((NUM_ANALYSIS, NY, NX))
-        for iAnalysis, (initTime, lead) in enumerate(zip(analysisInitDates, analysisLeads)):
-            minMaxs[0] = [lead]*2
-            path = getModelClimPath(initTime, varName)
-            analysisModelClim[iAnalysis, :], __ = nct.ncreadByDimRange(
-                path, varName, minMaxs, decodeTime=False
+        analysisModelClim = np.nan * np.ones((len(toDo), NY, NX))
+        if modelClimStore is not None and toDo:  # all inits at once
+            analysisModelClim[:] = modelClimStore.read(
+                varName, [analysisInitDates[i] for i in toDo], [analysisLeads[i] for i in toDo]
             )
+        elif modelClimStore is None:
+            for iToDo, iAnalysis in enumerate(toDo):
+                minMaxs[0] = [analysisLeads[iAnalysis]]*2
+                path = modelClimPaths[analysisInitDates[iAnalysis], varName]
+                analysisModelClim[iToDo, :], __ = nct.ncreadByDimRange(
+                    path, varName, minMaxs, decodeTime=False
+                )
 
         #
         # ---- read analysis raw [lead=?, valid=(T-119, T-0), init=(T-120, T-2)]
         logging.info(f'  reading analysis - raw')
-        slices = [
-            None,
-            slice(None, None),  # all lat
-            slice(None, None),  # all lon
-        ]
-
-        analysisRaw = np.nan * np.ones((NUM_ANALYSIS, NY, NX))
-        for iAnalysis, (initTime, lead) in enumerate(zip(analysisInitDates, analysisLeads)):
-            slices[0] = slice(lead-1, lead) # ilead = lead - 1
-            path = getDaymeanPath(initTime, varName)
-            analysisRaw[iAnalysis, :] = nct.ncread(path, varName, slices)
+        if toDo:
+            analysisRaw = nct.ncreadBatch(
+                [
+                    (daymeanPaths[analysisInitDates[i], varName], varName, analysisLeads[i]-1)  # ilead = lead - 1
+                    for i in toDo
+                ],
+                # consecutive REFDATEs share 119 of the 120 rows
+                cache=shared.setdefault('analysisRows', OrderedDict()),
+                maxCached=2 * NUM_ANALYSIS * len(VARNAMES),
+            )
 
         #
         # ---- calculate the analysis bias correction
-        iDayClim366 = [tt.dayOfYear229(int(d))-1 for d in analysisValidDates]
-        analysis = analysisRaw - analysisModelClim + obsClim[iDayClim366, :]
+        if toDo:
+            iDayClim366 = tt.dayOfYear229Array(np.trunc([analysisValidDates[i] for i in toDo])) - 1
+            analysis[toDo, :] = analysisRaw - analysisModelClim + obsClim[iDayClim366, :]
+        saveAnalysisSidecar(varName, analysis, analysisKeys, obsClimKey)
 
         #
         # ---- read forecast model clim
         logging.info(f'  reading forecast - model clim')
         forecastModelClim = np.nan * np.ones((NUM_FORECASTS, NUM_LEADS, NY, NX))
         for iForecast, initTime in enumerate(forecastInitDates):
+            if modelClimStore is not None:
+                forecastModelClim[iForecast, :] = modelClimStore.read(
+                    varName, initTime, [vd - initTime for vd in forecastValidDates]
+                )
+                continue
+
             # find the lead values (they are different for each forecast init)
             leads = [vd - initTime for vd in forecastValidDates]
             minMaxs = [
@@ -422,7 +549,7 @@ def main():
                 [LATS, LATN],
                 [LONW, LONE],
             ]
-            path = getModelClimPath(initTime, varName)
+            path = modelClimPaths[initTime, varName]
             forecastModelClim[iForecast, :], __ = nct.ncreadByDimRange(
                 path, varName, minMaxs, decodeTime=False
             )
@@ -437,14 +564,14 @@ def main():
             [LONW, LONE],
         ]
         for iForecast, initTime in enumerate(forecastInitDates):
-            path = getDaymeanPath(initTime, varName)
+            path = daymeanPaths[initTime, varName]
             forecastRaw[iForecast, :], __ = nct.ncreadByDimRange(
                 path, varName, minMaxs
             )
 
         #
         # ---- calculate the forecast bias correction
-        iDayClim366 = [tt.dayOfYear229(int(d))-1 for d in forecastValidDates]
+        iDayClim366 = tt.dayOfYear229Array(np.trunc(forecastValidDates)) - 1
         forecast = forecastRaw - forecastModelClim + obsClim[iDayClim366, :]
 
         #
@@ -455,16 +582,8 @@ def main():
         if not os.path.exists(os.path.dirname(desPath)):
             os.mkdir(os.path.dirname(desPath))
 
-        with open(desPath, 'wt') as f:
-            for f_2d in analysis:
-                for f_1d in f_2d:
-                    f.write(' '.join([f'{value:7.2f}' for value in f_1d]))
-                    f.write('\n')
-            for f_3d in forecast:
-                for f_2d in f_3d:
-                    for f_1d in f_2d:
-                        f.write(' '.join([f'{value:7.2f}' for value in f_1d]))
-                        f.write('\n')
+        # lons on each line, lat -> time (-> init) nested, see README.txt
+        at.writeRows(desPath, [analysis, forecast], fmt='%7.2f')
 
     # ------------------- #
     # ---- main loop ---- #
@@ -476,7 +595,218 @@ def main():
     #
     # ---- mark the log file for warning
     # ---- and make another warning file in the run path
-    postCheck()
+    return postCheck()
+
+
+LOGFORMATTER = logging.Formatter(
+    "%(asctime)s %(levelname)s %(message)s", datefmt='%Y-%m-%d %H:%M:%S'
+)
+SOCKETPATH = './tmps/nc2ascii.sock'  # for the service mode (--serve / --request)
+REQUESTTIMEOUT = 600  # seconds for --request to wait for the reply
+
+
+def setUpLogging():
+    '''
+    display the log in the terminal (the log files are added by nc2ascii),
+    also the initializer of the worker processes of the range mode
+    '''
+    logging.basicConfig(level=logging.DEBUG, handlers=[logging.StreamHandler()], force=True)
+    logging.getLogger().handlers[0].setFormatter(LOGFORMATTER)
+
+
+def convertRefDate(refDate: int, RUN_ID: str, shared: dict, isRangeMode: bool) -> str:
+    '''run nc2ascii for refDate, return the warnType'''
+    try:
+        if isRangeMode:  # a log file for each refDate
+            return nc2ascii(refDate, f'{RUN_ID}.{tt.float2format(refDate, '%Y%m%d')}', shared)
+        return nc2ascii(refDate, RUN_ID, shared)
+    except Exception:
+        if not isRangeMode:
+            raise
+        logging.exception(f'failed: {tt.float2format(refDate)}')  # continue with the next one
+        return 'error'
+    finally:
+        for handler in logging.getLogger().handlers[:]:
+            if isinstance(handler, logging.FileHandler):
+                logging.getLogger().removeHandler(handler)
+                handler.close()
+
+
+def convertRefDates(refDates: list, RUN_ID: str, isRangeMode: bool) -> dict:
+    '''
+    run nc2ascii for the refDates in order in this process, sharing the loaded inputs,
+    return {refDate: warnType}
+    '''
+    warnTypes, shared = {}, {}
+    # the clim and daymean files are read in the pre-check and again in run(),
+    # and by the following refDates, keep them open for the whole run
+    with nct.HandlePool(maxOpen=512):
+        for refDate in refDates:
+            warnTypes[refDate] = convertRefDate(refDate, RUN_ID, shared, isRangeMode)
+    return warnTypes
+
+
+def serve(socketPath: str):
+    '''
+    the service mode: keep the inputs (clims, open files, analysis rows) in memory,
+    and create the output of a reference date on each request,
+        request: "YYYYMMDD\\n", reply: "YYYYMMDD {warnType} {seconds}\\n"
+    The requests are served one by one (netCDF4 is not thread-safe).
+    '''
+    shared = {}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            arg = self.rfile.readline().decode().strip()
+            if not arg:  # e.g., probed by another server
+                return
+            if len(arg) != 8 or not arg.isdigit():
+                self.wfile.write(f'{arg} invalid\n'.encode())
+                return
+            t0 = time.perf_counter()
+            refDate = int(tt.format2float(arg, '%Y%m%d'))
+            RUN_ID = f'{tt.float2format(tt.now(), '%y%m%d_%H%M%S')}.{arg}'
+            warnType = convertRefDate(refDate, RUN_ID, shared, isRangeMode=True)
+            self.wfile.write(f'{arg} {warnType} {time.perf_counter()-t0:.2f}\n'.encode())
+
+    if os.path.exists(socketPath):  # left by a killed server, or still serving
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socketPath)
+            raise RuntimeError(f'already serving on {socketPath=}')
+        except ConnectionRefusedError:
+            os.remove(socketPath)
+
+    def stop(*args):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)  # kill (e.g., by cron or systemd) stops it normally
+
+    with nct.HandlePool(maxOpen=512), socketserver.UnixStreamServer(socketPath, Handler) as server:
+        logging.info(f'serving on {socketPath=}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info('stopped')
+        finally:
+            os.remove(socketPath)
+
+
+def request(socketPath: str, refDateString: str, timeout: float = REQUESTTIMEOUT) -> str:
+    '''
+    ask the service (see serve) for the output of YYYYMMDD, return the reply
+    raise FileNotFoundError or ConnectionRefusedError if not serving, socket.timeout if no reply in time
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socketPath)
+        client.sendall(f'{refDateString}\n'.encode())
+        with client.makefile('rb') as f:
+            return f.readline().decode().strip()
+
+
+def main():
+    def printUsage():
+        print('ERROR: unrecognized input arguments')
+        print('SYNTAX:')
+        print('./2_nc2ascii.py')
+        print('./2_nc2ascii.py YYYYMMDD')
+        print('./2_nc2ascii.py --start YYYYMMDD --end YYYYMMDD [--workers N]')
+        print('./2_nc2ascii.py --serve')
+        print('./2_nc2ascii.py --request YYYYMMDD')
+
+    def parseDate(arg):  # None if not YYYYMMDD
+        # make sure the input is numerical
+        if len(arg) != 8:
+            return None
+        if not all([char in '0123456789' for char in arg]):
+            return None
+        return int(tt.format2float(arg, '%Y%m%d'))
+
+    #
+    # ---- inputs
+    NUMWORKERS = 1  # worker processes for the range mode, set by --workers
+    inargs = sys.argv
+    if inargs[1:] == ['--serve']:
+        setUpLogging()
+        serve(SOCKETPATH)
+        return
+
+    if inargs[1:2] == ['--request']:
+        if len(inargs) != 3 or parseDate(inargs[2]) is None:
+            printUsage()
+            return
+        try:
+            reply = request(SOCKETPATH, inargs[2])
+        except (FileNotFoundError, ConnectionRefusedError):
+            print(f'ERROR: service not running at {SOCKETPATH}, start it by ./2_nc2ascii.py --serve')
+            sys.exit(1)
+        except socket.timeout:
+            print(f'ERROR: no reply from the service at {SOCKETPATH} in {REQUESTTIMEOUT} seconds')
+            sys.exit(1)
+        print(reply)
+        if len(reply.split()) < 2:  # e.g., the service failed on the request
+            print(f'ERROR: unexpected reply {reply=}, see the log of the service')
+            sys.exit(1)
+        sys.exit(0 if reply.split()[1] in ['None', 'degraded'] else 1)
+
+    isRangeMode = len(inargs) > 2
+    if len(inargs) == 1:
+        refDates = [tt.today()]
+
+    elif len(inargs) == 2:
+        REFDATE = parseDate(inargs[1])
+        if REFDATE is None:
+            printUsage()
+            return
+        refDates = [REFDATE]
+
+    else:  # --start YYYYMMDD --end YYYYMMDD [--workers N]
+        options = dict(zip(inargs[1::2], inargs[2::2]))
+        if len(inargs) % 2 == 0 \
+                or not {'--start', '--end'} <= set(options) <= {'--start', '--end', '--workers'}:
+            printUsage()
+            return
+
+        start, end = parseDate(options['--start']), parseDate(options['--end'])
+        if start is None or end is None or start > end:
+            printUsage()
+            return
+
+        if '--workers' in options:
+            if not options['--workers'].isdigit():
+                printUsage()
+                return
+            NUMWORKERS = int(options['--workers'])
+
+        refDates = list(range(start, end+1))
+
+    #
+    # ---- run
+    RUN_ID = tt.float2format(tt.now(), '%y%m%d_%H%M%S')
+    setUpLogging()
+
+    if not isRangeMode:
+        convertRefDates(refDates, RUN_ID, isRangeMode)
+        return
+
+    # consecutive dates share most of the inputs, so each worker takes a continuous chunk
+    numChunks = max(min(NUMWORKERS, len(refDates)), 1)
+    chunks = [[int(d) for d in chunk] for chunk in np.array_split(refDates, numChunks)]
+    logging.info(f'range mode: {len(refDates)} reference dates, {numChunks} worker(s)')
+    warnTypes = {}
+    if numChunks == 1:
+        warnTypes.update(convertRefDates(refDates, RUN_ID, isRangeMode))
+    else:
+        with ProcessPoolExecutor(max_workers=numChunks, initializer=setUpLogging) as executor:
+            for result in executor.map(
+                convertRefDates, chunks, [RUN_ID]*numChunks, [isRangeMode]*numChunks
+            ):
+                warnTypes.update(result)
+
+    logging.info(f'range mode: {len(refDates)} reference dates done')
+    for warnType in ['degraded', 'error']:
+        refDatesWarned = [tt.float2format(d) for d, wt in warnTypes.items() if wt == warnType]
+        logging.info(f'  {warnType}: {len(refDatesWarned)} {' '.join(refDatesWarned)}')
 
 
 if __name__ == '__main__':
@@ -6,6 +6,7 @@ works on ln23 (obs data location)
 import tools.timetools as tt
 import tools.nctools as nct
 import tools.caltools as ct
+import tools.asciitools as at
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -25,14 +26,7 @@ def main():
 
     #
     # ---- read output
-    with open(path, 'rt') as f:
-        lines = f.readlines()
-
-    data = np.array([[float(num) for num in line.split()] for line in lines])
-    data = np.reshape(data, (240, 21, 49))
-
-    analysis = data[:120, :]
-    forecast = np.reshape(data[120:, :], (3, 40, 21, 49))
+    analysis, forecast = at.readBsiso(path)  # (120, 21, 49), (3, 40, 21, 49)
 
     #
     # ---- read obs
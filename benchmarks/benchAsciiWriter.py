@@ -0,0 +1,95 @@
+#!/nwpr/gfs/com120/.conda/envs/rd/bin/python
+'''
+SYNTAX
+    ./benchmarks/benchAsciiWriter.py [number of repeats]
+
+Time the ASCII writer of 2_nc2ascii.py (tools.asciitools.writeRows)
+against the original per-value f-string loop for one BSISO output
+(120x21x49 analysis + 3x40x21x49 forecast),
+and check that both write the same bytes.
+The reader of 3_peek.py (tools.asciitools.readBsiso) is timed likewise
+against the original float() per token.
+'''
+import os
+import sys
+import shutil
+import tempfile
+import time
+import filecmp
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.asciitools as at
+import numpy as np
+
+
+def writeByLoop(desPath, analysis, forecast):  # the original writer
+    with open(desPath, 'wt') as f:
+        for f_2d in analysis:
+            for f_1d in f_2d:
+                f.write(' '.join([f'{value:7.2f}' for value in f_1d]))
+                f.write('\n')
+        for f_3d in forecast:
+            for f_2d in f_3d:
+                for f_1d in f_2d:
+                    f.write(' '.join([f'{value:7.2f}' for value in f_1d]))
+                    f.write('\n')
+
+
+def readByLoop(srcPath):  # the original reader of 3_peek.py
+    with open(srcPath, 'rt') as f:
+        lines = f.readlines()
+    data = np.array([[float(num) for num in line.split()] for line in lines])
+    data = np.reshape(data, (240, 21, 49))
+    return data[:120, :], np.reshape(data[120:, :], (3, 40, 21, 49))
+
+
+def main():
+    numRepeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    rng = np.random.default_rng(0)
+    analysis = rng.normal(0, 30, (120, 21, 49))
+    forecast = rng.normal(0, 30, (3, 40, 21, 49))
+    # the rounding ties and special values should be the same as well
+    analysis[0, 0, :8] = [np.nan, np.inf, -np.inf, -0.0, 0.005, -0.005, 1.125, 1e10]
+
+    tmpDir = tempfile.mkdtemp()
+    try:
+        writers = {
+            'f-string loop': lambda path: writeByLoop(path, analysis, forecast),
+            'asciitools.writeRows': lambda path: at.writeRows(path, [analysis, forecast]),
+        }
+        print(f'{numRepeats=}')
+        print(f'{"writer":>24s} {"ms/file":>8s}')
+        for name, writer in writers.items():
+            path = f'{tmpDir}/{name}'
+            t0 = time.perf_counter()
+            for __ in range(numRepeats):
+                writer(path)
+            elapsed = (time.perf_counter() - t0) / numRepeats
+            print(f'{name:>24s} {elapsed*1e3:8.1f}')
+
+        paths = [f'{tmpDir}/{name}' for name in writers]
+        print(f'identical output: {filecmp.cmp(*paths, shallow=False)}')
+
+        readers = {
+            'float() per token': readByLoop,
+            'asciitools.readBsiso': at.readBsiso,
+        }
+        print(f'{"reader":>24s} {"ms/file":>8s}')
+        results = []
+        for name, reader in readers.items():
+            t0 = time.perf_counter()
+            for __ in range(numRepeats):
+                result = reader(paths[0])
+            elapsed = (time.perf_counter() - t0) / numRepeats
+            print(f'{name:>24s} {elapsed*1e3:8.1f}')
+            results.append(result)
+        print(f'identical values: {all([
+            np.array_equal(*blocks, equal_nan=True) for blocks in zip(*results)
+        ])}')
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    main()
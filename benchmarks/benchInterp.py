@@ -0,0 +1,92 @@
+#!/nwpr/gfs/com120/.conda/envs/rd/bin/python
+'''
+SYNTAX
+    ./benchmarks/benchInterp.py [number of repeats]
+
+Time tools.caltools.interp_1d against the original per-point loop
+for the regridding in 3_peek.py (160 days of ERA5 0.5deg -> 2.5deg, lon then lat),
+and check that both give the same values.
+'''
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.caltools as ct
+import numpy as np
+
+
+def interpByLoop(x, y, x_new, axis=0, extrapolate=False):  # the original interp_1d
+    x = np.array(x, dtype=np.double)
+    y = np.array(y, dtype=np.double)
+    x_new = np.array(x_new, dtype=np.double)
+    if np.array_equal(x, x_new):
+        return y
+    if axis != 0:
+        y = np.swapaxes(y, 0, axis)
+
+    nx = len(x)
+    ixl = np.zeros((len(x_new),), dtype=np.int32)
+    for ix_new in range(len(x_new)):
+        dx = np.array(x_new[ix_new] - x)
+        if extrapolate:
+            if x_new[ix_new] < x[0]:
+                ixl[ix_new] = 0
+                continue
+            if x_new[ix_new] > x[-1]:
+                ixl[ix_new] = nx - 2
+                continue
+        ix = np.where(dx == 0)[0]  # ix[0]: an array can't be assigned to an element in numpy 2
+        if len(ix) and ix[0] == 0:
+            ixl[ix_new] = ix[0]
+            continue
+        if len(ix) and ix[0] != 0:
+            ixl[ix_new] = ix[0]-1
+            continue
+        ix = np.where(dx < 0)[0][0]
+        ixl[ix_new] = ix-1
+    ixr = ixl + 1
+
+    y_new = x_new - x[ixl]
+    y_new /= x[ixr] - x[ixl]
+    y_new = np.tile(y_new, [1 for i in range(y.ndim)])
+    if y_new.ndim != 1:
+        y_new = np.swapaxes(y_new, 0, y_new.ndim-1)
+    y_new = y_new * (y[ixr, :] - y[ixl, :])
+    y_new += y[ixl]
+    if axis != 0:
+        y_new = np.swapaxes(y_new, 0, axis)
+    return y_new
+
+
+def main():
+    numRepeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    LON = np.r_[40:160+1:2.5]
+    LAT = np.r_[-10:40+1:2.5]
+    lon = np.r_[40:160+0.1:0.5] + 0.25
+    lat = np.r_[-10:40+0.1:0.5] + 0.25
+    rng = np.random.default_rng(0)
+    days = rng.normal(0, 10, (160, len(lat), len(lon)))
+
+    def regrid(interp):
+        return np.array([
+            interp(lat, interp(lon, day, LON, axis=-1, extrapolate=True), LAT, axis=-2, extrapolate=True)
+            for day in days
+        ])
+
+    print(f'{numRepeats=}')
+    print(f'{"interpolation":>24s} {"ms/160days":>10s}')
+    results = {}
+    for name, interp in {'original loop': interpByLoop, 'caltools.interp_1d': ct.interp_1d}.items():
+        t0 = time.perf_counter()
+        for __ in range(numRepeats):
+            results[name] = regrid(interp)
+        elapsed = (time.perf_counter() - t0) / numRepeats
+        print(f'{name:>24s} {elapsed*1e3:10.1f}')
+
+    print(f'identical output: {np.array_equal(*results.values())}')
+
+
+if __name__ == '__main__':
+    main()
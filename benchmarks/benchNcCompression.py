@@ -0,0 +1,68 @@
+#!/nwpr/gfs/com120/.conda/envs/rd/bin/python
+'''
+SYNTAX
+    ./benchmarks/benchNcCompression.py [number of repeats]
+
+Compare the zlib levels of the daymean files (1_convertOp2nc.py, NCCOMPLEVEL)
+against the uncompressed output:
+    write: nctools.save of a (45 leads, 21 lats, 49 lons) cube
+    read: the reads of 2_nc2ascii.py, i.e., one lead for the analysis (ncread)
+          and 40 leads for the forecast (ncreadByDimRange)
+    size: the file size
+'''
+import os
+import sys
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.nctools as nct
+import numpy as np
+
+
+def main():
+    numRepeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    COMPLEVELS = [0, 1, 4, 9]
+    NUMLEADS, LATS, LONS = 45, np.r_[-10:40+2.5:2.5], np.r_[40:160+2.5:2.5]
+    INITTIME = 9200
+
+    # smooth fields with noise, similar to the daymean u850/olr
+    rng = np.random.default_rng(0)
+    y, x = np.meshgrid(LATS, LONS, indexing='ij')
+    data = 220 + 30 * np.cos(np.deg2rad(y * 3))[None, :, :] * np.sin(np.deg2rad(x))[None, :, :] \
+        + rng.normal(0, 5, (NUMLEADS, len(LATS), len(LONS)))
+
+    tmpDir = tempfile.mkdtemp()
+    print(f'{numRepeats=}')
+    print(f'{"complevel":>10s} {"write (ms)":>11s} {"read (ms)":>10s} {"size (kB)":>10s}')
+    try:
+        for complevel in COMPLEVELS:
+            paths = [f'{tmpDir}/{complevel}_{i}.nc' for i in range(numRepeats)]
+
+            t0 = time.perf_counter()
+            for path in paths:
+                nct.save(path, {
+                    'u850': data,
+                    'time': INITTIME + 1 + np.arange(NUMLEADS),
+                    'lat': LATS,
+                    'lon': LONS,
+                }, overwrite=True, complevel=complevel)
+            writeTime = (time.perf_counter() - t0) / numRepeats
+
+            t0 = time.perf_counter()
+            for path in paths:
+                nct.ncread(path, 'u850', [slice(0, 1), slice(None), slice(None)])
+                nct.ncreadByDimRange(
+                    path, 'u850', [[INITTIME + 2, INITTIME + 41], [-10, 40], [40, 160]]
+                )
+            readTime = (time.perf_counter() - t0) / numRepeats
+
+            size = os.path.getsize(paths[0])
+            print(f'{complevel:10d} {writeTime*1e3:11.2f} {readTime*1e3:10.2f} {size/1024:10.1f}')
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/nwpr/gfs/com120/.conda/envs/rd/bin/python
+'''
+SYNTAX
+    ./benchmarks/benchNcOpens.py [number of repeats]
+
+Count how many times a nc file is opened (netCDF4.Dataset) per call
+of the nctools readers used by 2_nc2ascii.py, and time the calls:
+    cold: the memos of nctools (decoded times, checked dimensions) cleared before each call
+    warm: the memos kept between the calls, e.g., the repeated requests of --serve
+'''
+import os
+import sys
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.nctools as nct
+import numpy as np
+
+
+class CountingDataset(nct.nc.Dataset):
+    numOpens = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingDataset.numOpens += 1
+        super().__init__(*args, **kwargs)
+
+
+def main():
+    numRepeats = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    INITTIME = 9200
+
+    tmpDir = tempfile.mkdtemp()
+    path = f'{tmpDir}/daymean.nc'
+    nct.save(path, {
+        'u850': np.random.default_rng(0).normal(0, 5, (45, 21, 49)),
+        'time': INITTIME + 1 + np.arange(45),
+        'lat': np.r_[-10:40+2.5:2.5],
+        'lon': np.r_[40:160+2.5:2.5],
+    }, overwrite=True)
+
+    calls = {
+        'ncreadByDimRange': lambda: nct.ncreadByDimRange(
+            path, 'u850', [[INITTIME + 2, INITTIME + 41], [-10, 40], [40, 160]]
+        ),
+        'ncreadByDimRange (decodeTime=False)': lambda: nct.ncreadByDimRange(
+            path, 'u850', [[None, None], [-10, 40], [40, 160]], decodeTime=False
+        ),
+        'ncread': lambda: nct.ncread(
+            path, 'u850', [slice(0, 1), slice(None), slice(None)]
+        ),
+        'ncreadtime': lambda: nct.ncreadtime(path),
+    }
+
+    originalDataset, nct.nc.Dataset = nct.nc.Dataset, CountingDataset
+    try:
+        print(f'{numRepeats=}')
+        print(f'{"call":>36s} {"memos":>5s} {"opens/call":>10s} {"ms/call":>8s}')
+        for name, call in calls.items():
+            for isWarm in [False, True]:
+                CountingDataset.numOpens = 0
+                elapsed = 0
+                for __ in range(numRepeats):
+                    if not isWarm:
+                        nct._decodedTimes.clear()
+                        nct._increasingDims.clear()
+                    t0 = time.perf_counter()
+                    call()
+                    elapsed += (time.perf_counter() - t0) / numRepeats
+                print(f'{name:>36s} {"warm" if isWarm else "cold":>5s} '
+                      f'{CountingDataset.numOpens/numRepeats:10.1f} {elapsed*1e3:8.3f}')
+    finally:
+        nct.nc.Dataset = originalDataset
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    main()
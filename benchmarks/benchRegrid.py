@@ -0,0 +1,86 @@
+#!/nwpr/gfs/com120/.conda/envs/rd/bin/python
+'''
+SYNTAX
+    ./benchmarks/benchRegrid.py grib2Path [cdo path]
+
+Compare the conversion of 1_convertOp2nc.py (tools.gribtools.readFields
++ tools.caltools.regridBilinear) against cdo for the fields of a grib2 file
+(e.g., tmps/RUNID/yymmdd/u850.grib2 kept by CLEANTMPDIR = False):
+    cdo -f nc4 --reduce_dim -sellonlatbox,40,160,-10,40 -remapbil,r144x73 grib2Path
+and print the time and the max difference.
+
+Both are bilinear in lat/lon on the same source grid, in double precision,
+so the difference is expected to be at the rounding level. The daymean files
+are float32, so the values are the same if the difference is within
+the float32 spacing of the values (printed as "float32 ulp").
+'''
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.gribtools as gt
+import tools.caltools as ct
+import tools.nctools as nct
+import numpy as np
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    srcPath = sys.argv[1]
+    cdo = sys.argv[2] if len(sys.argv) > 2 else '/nwpr/gfs/com120/.conda/envs/rd/bin/cdo'
+    REGRIDLONS = np.r_[40:160+2.5:2.5]  # as 1_convertOp2nc.py
+    REGRIDLATS = np.r_[-10:40+2.5:2.5]
+
+    # ---- python
+    t0 = time.perf_counter()
+    data, srcLat, srcLon = gt.readFields(srcPath)
+    data = ct.regridBilinear(data, srcLon, srcLat, REGRIDLONS, REGRIDLATS)
+    elapsedPython = time.perf_counter() - t0
+
+    # ---- cdo
+    if shutil.which(cdo) is None:
+        print(f'cdo not found: {cdo=}')
+        sys.exit(1)
+    tmpDir = tempfile.mkdtemp()
+    try:
+        desPath = f'{tmpDir}/regridded.nc'
+        t0 = time.perf_counter()
+        subprocess.run(
+            [cdo, '-s', '-f', 'nc4', '--reduce_dim',
+             '-sellonlatbox,40,160,-10,40', '-remapbil,r144x73', srcPath, desPath],
+            check=True,
+        )
+        elapsedCdo = time.perf_counter() - t0
+
+        varName = [name for name in nct.getVarNames(desPath) if len(nct.getDimNames(desPath, name)) >= 2][0]
+        latName, lonName = nct.getDimNames(desPath, varName)[-2:]
+        lat, lon = nct.read(desPath, latName), nct.read(desPath, lonName)
+        dataCdo = np.reshape(nct.ncread(desPath, varName), (-1, len(lat), len(lon)))
+    finally:
+        shutil.rmtree(tmpDir)
+
+    # ---- the same grid (cdo can keep the latitudes from north to south)
+    if lat[0] > lat[-1]:
+        lat, dataCdo = lat[::-1], dataCdo[:, ::-1, :]
+    if not (np.allclose(lat, REGRIDLATS) and np.allclose(lon, REGRIDLONS)):
+        print(f'different grids: cdo {lat=}, {lon=}')
+        sys.exit(1)
+
+    diff = np.abs(data - dataCdo)
+    ulp = np.spacing(np.abs(dataCdo).astype(np.float32)).astype(np.double)
+    print(f'{srcPath=}, {data.shape=}')
+    print(f'{"":>8s} {"time (ms)":>10s}')
+    print(f'{"python":>8s} {elapsedPython*1e3:10.1f}')
+    print(f'{"cdo":>8s} {elapsedCdo*1e3:10.1f}')
+    print(f'max abs difference: {np.nanmax(diff):.3e}')
+    print(f'max difference in float32 ulp: {np.nanmax(diff / ulp):.2f}')
+
+
+if __name__ == '__main__':
+    main()
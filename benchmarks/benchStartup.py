@@ -0,0 +1,96 @@
+#!/nwpr/gfs/com120/.conda/envs/rd/bin/python
+'''
+SYNTAX
+    ./benchmarks/benchStartup.py [number of repeats]
+
+Time the start of the pipeline scripts when there is nothing to do,
+as in the frequent watchdog runs:
+    - importing the tools modules (and whether netCDF4/dateutil are imported)
+    - 1_convertOp2nc.py with all the daymean files completed
+      (in a temporary run directory, after a first run for the manifest)
+    - 2_nc2ascii.py with an invalid argument (the start of --request)
+'''
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import time
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def timeCommand(command, cwd, numRepeats, waitNextSecond=False):
+    '''
+    the best wall time (s) of the repeats,
+    waitNextSecond: for the scripts whose log file names are by the second
+    '''
+    elapsed = []
+    for __ in range(numRepeats):
+        if waitNextSecond:
+            time.sleep(1 - time.time() % 1 + 0.01)
+        t0 = time.perf_counter()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        elapsed.append(time.perf_counter() - t0)
+    return min(elapsed)
+
+
+def makeCompletedRunDir(runDir, refDate, numInits=121, numLeads=45):
+    import tools.timetools as tt
+    import tools.nctools as nct
+    import numpy as np
+
+    for subDir in ['logs', 'tmps', 'data/daymean']:
+        os.makedirs(f'{runDir}/{subDir}')
+    for iInit in range(numInits):
+        initTime = refDate - (iInit + 1)
+        for varName in ['u850', 'olr']:
+            path = tt.float2format(initTime, f'{runDir}/data/daymean/%Y/%y%m%d_{varName}.nc')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            nct.save(path, {
+                varName: np.zeros((numLeads, 1, 1)),
+                'time': initTime + 1 + np.arange(numLeads),
+                'lat': [0.],
+                'lon': [0.],
+            }, overwrite=True)
+
+
+def main():
+    numRepeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    python = sys.executable
+
+    print(f'{numRepeats=}')
+    print(f'{"":>40s} {"ms":>8s}')
+    t = timeCommand([python, '-c', 'pass'], ROOT, numRepeats)
+    print(f'{"python (no imports)":>40s} {t*1e3:8.1f}')
+
+    for module in ['tools.timetools', 'tools.nctools', 'tools.climtools']:
+        t = timeCommand([python, '-c', f'import {module}'], ROOT, numRepeats)
+        print(f'{f"import {module}":>40s} {t*1e3:8.1f}')
+
+    imported = subprocess.run([python, '-c', (
+        'import sys, tools.nctools, tools.timetools, tools.climtools;'
+        'print([m for m in ["netCDF4", "dateutil"] if m in sys.modules])'
+    )], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    print(f'{"heavy modules imported by tools":>40s} {imported}')
+
+    t = timeCommand([python, f'{ROOT}/2_nc2ascii.py', '--invalid'], ROOT, numRepeats)
+    print(f'{"2_nc2ascii.py (usage only)":>40s} {t*1e3:8.1f}')
+
+    import tools.timetools as tt
+    refDate = tt.ymd2int(2025, 3, 10)
+    runDir = tempfile.mkdtemp()
+    try:
+        makeCompletedRunDir(runDir, refDate)
+        command = [python, f'{ROOT}/1_convertOp2nc.py', tt.float2format(refDate)]
+        result = subprocess.run(command, cwd=runDir, capture_output=True, text=True)  # builds the manifest
+        if 'all outputs are completed' not in result.stderr:
+            raise RuntimeError(f'1_convertOp2nc.py failed in the test run directory:\n{result.stderr}')
+        t = timeCommand(command, runDir, numRepeats, waitNextSecond=True)
+        print(f'{"1_convertOp2nc.py (all completed)":>40s} {t*1e3:8.1f}')
+    finally:
+        shutil.rmtree(runDir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+'''
+SYNTAX
+    python tests/data/makeGribFixtures.py
+
+Write the GRIB2 fixtures of tests/test_gribtools.py by eccodes (not needed to run the tests),
+and the values, latitudes and longitudes decoded by eccodes to gribFixtures.npz.
+    latlon_complex_sd2_bitmap.grib2: lat-lon (3.0), complex packing with spatial differencing of order 2 (5.3),
+                                     with a bitmap
+    gaussian_complex_missing.grib2: Gaussian (3.40), complex packing (5.2), with missing value management
+    gaussian_complex_sd1.grib2: Gaussian (3.40), complex packing with spatial differencing of order 1 (5.3),
+                                south to north
+'''
+import os
+import numpy as np
+import eccodes
+
+DATADIR = os.path.dirname(os.path.abspath(__file__))
+MISSING = 9999.
+
+
+def setLatLon(h):
+    for key, value in [
+        ('Ni', 16), ('Nj', 9),
+        ('latitudeOfFirstGridPointInDegrees', 40.), ('latitudeOfLastGridPointInDegrees', 0.),
+        ('longitudeOfFirstGridPointInDegrees', 100.), ('longitudeOfLastGridPointInDegrees', 137.5),
+        ('iDirectionIncrementInDegrees', 2.5), ('jDirectionIncrementInDegrees', 5.),
+    ]:
+        eccodes.codes_set(h, key, value)
+
+
+def setGaussian(h, southToNorth=False):
+    lats = np.degrees(np.arcsin(np.polynomial.legendre.leggauss(16)[0]))[::-1]
+    if southToNorth:
+        lats = lats[::-1]
+        eccodes.codes_set(h, 'jScansPositively', 1)
+    for key, value in [
+        ('N', 8), ('Ni', 32), ('Nj', 16),
+        ('latitudeOfFirstGridPointInDegrees', lats[0]), ('latitudeOfLastGridPointInDegrees', lats[-1]),
+        ('longitudeOfFirstGridPointInDegrees', 0.), ('longitudeOfLastGridPointInDegrees', 348.75),
+        ('iDirectionIncrementInDegrees', 11.25),
+    ]:
+        eccodes.codes_set(h, key, value)
+
+
+def makeFixture(name, sample, setGrid, packingType, order=None, bitmap=False, missingManagement=False, seed=0):
+    rng = np.random.default_rng(seed)
+    h = eccodes.codes_grib_new_from_samples(sample)
+    setGrid(h)
+    eccodes.codes_set_string(h, 'packingType', packingType)
+    eccodes.codes_set(h, 'bitsPerValue', 16)
+    if order:
+        eccodes.codes_set(h, 'orderOfSpatialDifferencing', order)
+    if bitmap:
+        eccodes.codes_set(h, 'bitmapPresent', 1)
+    if missingManagement:
+        eccodes.codes_set(h, 'missingValueManagementUsed', 1)
+    eccodes.codes_set(h, 'missingValue', MISSING)
+
+    numPoints = eccodes.codes_get(h, 'Ni') * eccodes.codes_get(h, 'Nj')
+    eccodes.codes_set(h, 'numberOfDataPoints', numPoints)
+    values = np.cumsum(rng.normal(0, 3, numPoints)) + 250
+    if bitmap or missingManagement:
+        values[rng.random(numPoints) < 0.2] = MISSING
+    eccodes.codes_set_values(h, values)
+
+    message = eccodes.codes_get_message(h)
+    eccodes.codes_release(h)
+    with open(f'{DATADIR}/{name}.grib2', 'wb') as f:
+        f.write(message)
+
+    h = eccodes.codes_new_from_message(message)  # decode the message as written
+    decoded = eccodes.codes_get_values(h)
+    decoded[decoded == MISSING] = np.nan
+    lats = np.unique(eccodes.codes_get_array(h, 'latitudes'))
+    lons = eccodes.codes_get_array(h, 'longitudes')[:eccodes.codes_get(h, 'Ni')]
+    if not eccodes.codes_get(h, 'jScansPositively'):
+        lats = lats[::-1]
+    eccodes.codes_release(h)
+    return {
+        f'{name}_values': decoded.reshape(len(lats), len(lons)),
+        f'{name}_lats': lats,
+        f'{name}_lons': lons,
+    }
+
+
+def main():
+    expected = {}
+    expected.update(makeFixture(
+        'latlon_complex_sd2_bitmap', 'regular_ll_sfc_grib2', setLatLon,
+        'grid_complex_spatial_differencing', order=2, bitmap=True, seed=0,
+    ))
+    expected.update(makeFixture(
+        'gaussian_complex_missing', 'regular_gg_sfc_grib2', setGaussian,
+        'grid_complex', missingManagement=True, seed=1,
+    ))
+    expected.update(makeFixture(
+        'gaussian_complex_sd1', 'regular_gg_sfc_grib2', lambda h: setGaussian(h, southToNorth=True),
+        'grid_complex_spatial_differencing', order=1, seed=2,
+    ))
+    np.savez(f'{DATADIR}/gribFixtures.npz', **expected)
+
+
+if __name__ == '__main__':
+    main()
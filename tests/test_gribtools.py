@@ -0,0 +1,231 @@
+'''
+SYNTAX
+    python -m unittest discover -s tests
+
+Test tools.gribtools with small hand-built GRIB2 files:
+the inventory, byte offsets and sizes of indexFile,
+the bytes of readRecords from a file and from a tar member,
+and the decoded values, also of the complex packings of tests/data
+(written and decoded by eccodes, see tests/data/makeGribFixtures.py).
+'''
+import os
+import sys
+import shutil
+import struct
+import tarfile
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.gribtools as gt
+import tools.tartools as tart
+import numpy as np
+
+
+DATADIR = f'{os.path.dirname(os.path.abspath(__file__))}/data'
+FIXTURES = ['latlon_complex_sd2_bitmap', 'gaussian_complex_missing', 'gaussian_complex_sd1']
+
+
+# ---- a minimal GRIB2 writer: lat-lon grid (template 3.0), analysis/forecast
+# ---- at a level (4.0), simple packing (5.0), no bitmap
+GRIDLATS = [10., 0., -10.]  # scanned from north to south
+GRIDLONS = [0., 90., 180., 270.]
+
+
+def makeSection(number, body):
+    return struct.pack('>IB', 5 + len(body), number) + body
+
+
+def makeSection3(lats=GRIDLATS, lons=GRIDLONS):
+    def micro(degree):  # sign and magnitude
+        value = round(degree * 1e6)
+        return struct.pack('>I', abs(value) | (0x80000000 if value < 0 else 0))
+    template = (
+        bytes([6, 0]) + bytes(4) + bytes([0]) + bytes(4) + bytes([0]) + bytes(4)  # shape of the earth
+        + struct.pack('>II', len(lons), len(lats)) + struct.pack('>I', 0) + struct.pack('>I', 0xffffffff)
+        + micro(lats[0]) + micro(lons[0]) + bytes([48])
+        + micro(lats[-1]) + micro(lons[-1])
+        + micro(abs(lons[1] - lons[0])) + micro(abs(lats[1] - lats[0]))
+        + bytes([0 if lats[0] > lats[-1] else 64])  # scanning mode
+    )
+    return makeSection(3, bytes([0]) + struct.pack('>I', len(lats) * len(lons)) + bytes([0, 0])
+                       + struct.pack('>H', 0) + template)
+
+
+def makeSection4(category, number, levelType, levelValue, levelScale=0):
+    return makeSection(4, struct.pack('>HH', 0, 0) + bytes([category, number, 2, 0, 0])
+                       + struct.pack('>HB', 0, 0) + bytes([1]) + struct.pack('>I', 24)
+                       + bytes([levelType, levelScale]) + struct.pack('>I', levelValue)
+                       + bytes([255, 0]) + struct.pack('>I', 0))
+
+
+def makeSimplePacking(values, decimalScale=1, numBits=16):
+    '''sections 5-7 of the values (ny, nx) by simple packing'''
+    scaled = np.round(np.asarray(values, dtype=float).ravel() * 10**decimalScale)
+    reference = float(np.min(scaled))
+    packed = (scaled - reference).astype(np.uint64)
+    bits = ''.join([f'{value:0{numBits}b}' for value in packed.tolist()])
+    bits += '0' * (-len(bits) % 8)
+    data = int(bits, 2).to_bytes(len(bits) // 8, 'big') if bits else b''
+    section5 = makeSection(5, struct.pack('>IH', scaled.size, 0) + struct.pack('>f', reference)
+                           + struct.pack('>hh', 0, decimalScale) + bytes([numBits, 0]))
+    return section5 + makeSection(6, bytes([255])) + makeSection(7, data)
+
+
+def makeMessage(fields: list, discipline=0, date=(2025, 3, 9, 0), lats=GRIDLATS) -> bytes:
+    '''
+    fields: [(category, number, levelType, levelValue, values), ...],
+    all in one message (sections 3-7 repeated for each field)
+    '''
+    section1 = makeSection(1, struct.pack('>HHBBB', 7, 0, 2, 1, 1)
+                           + struct.pack('>HBBBBB', *date, 0, 0) + bytes([0, 1]))
+    body = section1
+    for category, number, levelType, levelValue, values in fields:
+        body += makeSection3(lats) + makeSection4(category, number, levelType, levelValue) \
+            + makeSimplePacking(values)
+    body += b'7777'
+    return b'GRIB' + bytes([0, 0, discipline, 2]) + struct.pack('>Q', 16 + len(body)) + body
+
+
+def makeValues(seed):
+    return np.round(np.random.default_rng(seed).normal(0, 10, (len(GRIDLATS), len(GRIDLONS))), 1)
+
+
+MESSAGES = [  # (message, expected inventory fields)
+    (makeMessage([(2, 2, 100, 85000, makeValues(0))]),
+     ['d=2025030900:UGRD:850 mb:']),
+    (makeMessage([(5, 4, 8, 0, makeValues(1))]),
+     ['d=2025030900:ULWRF:top of atmosphere:']),
+    (makeMessage([(0, 0, 103, 2, makeValues(2))], date=(2025, 3, 10, 12)),
+     ['d=2025031012:TMP:2 m above ground:']),
+    (makeMessage([(2, 2, 100, 20000, makeValues(3)), (2, 3, 100, 20000, makeValues(4))]),
+     ['d=2025030900:UGRD:200 mb:', 'd=2025030900:VGRD:200 mb:']),
+    (makeMessage([(1, 7, 1, 0, makeValues(5))], discipline=2),
+     ['d=2025030900:var2_1_7:surface:']),
+]
+
+
+class TestGribtools(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.path = f'{self.tmpDir}/20250310.grib2'
+        with open(self.path, 'wb') as f:
+            f.write(b''.join([message for message, __ in MESSAGES]))
+
+        # the expected records, offsets and sizes counted from the messages
+        self.expected, offset = [], 0
+        for iMessage, (message, fields) in enumerate(MESSAGES):
+            for iField, field in enumerate(fields):
+                recordNumber = f'{iMessage+1}' if len(fields) == 1 else f'{iMessage+1}.{iField+1}'
+                self.expected.append({
+                    'recordNumber': recordNumber,
+                    'offset': offset,
+                    'size': len(message),
+                    'inventory': f'{recordNumber}:{offset}:{field}',
+                })
+            offset += len(message)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_scanMessages(self):
+        self.assertEqual(gt.scanMessages(self.path), self.expected)
+
+    def test_indexFile(self):
+        records = gt.indexFile(self.path, [':UGRD:850 mb:', ':ULWRF:', ':UGRD:', ':HGT:'])
+        self.assertEqual(records[':UGRD:850 mb:'], [self.expected[0]])
+        self.assertEqual(records[':ULWRF:'], [self.expected[1]])
+        self.assertEqual(records[':UGRD:'], [self.expected[0], self.expected[3]])
+        self.assertEqual(records[':HGT:'], [])
+
+    def test_readRecords(self):
+        records = gt.indexFile(self.path, [':ULWRF:', ':TMP:'])
+        messages = gt.readRecords(self.path, [records[':ULWRF:'][0], records[':TMP:'][0]])
+        self.assertEqual(messages, [MESSAGES[1][0], MESSAGES[2][0]])
+
+    def test_readRecordsFromTarMember(self):
+        tarPath = f'{self.tmpDir}/202503dm.tar'
+        with open(f'{self.tmpDir}/20250309.grib2', 'wb') as f:  # a member before, for a non-zero offset
+            f.write(MESSAGES[0][0] * 3)
+        with tarfile.open(tarPath, 'w') as hTar:
+            for memberName in ['20250309.grib2', '20250310.grib2']:
+                hTar.add(f'{self.tmpDir}/{memberName}', arcname=memberName)
+
+        start, length = tart.getMemberRange(tarPath, '20250310.grib2')
+        self.assertGreater(start, 0)
+        records = gt.indexFile(tarPath, [':UGRD:850 mb:', ':ULWRF:'], start, length)
+        for matcher, expected in zip([':UGRD:850 mb:', ':ULWRF:'], self.expected[:2]):
+            self.assertEqual(len(records[matcher]), 1)
+            record = records[matcher][0]
+            self.assertEqual(record['offset'], start + expected['offset'])  # offset in the tar file
+            self.assertEqual(record['size'], expected['size'])
+            self.assertEqual(
+                record['inventory'],
+                expected['inventory'].replace(f':{expected["offset"]}:', f':{start + expected["offset"]}:'),
+            )
+
+        messages = gt.readRecords(tarPath, [records[':UGRD:850 mb:'][0], records[':ULWRF:'][0]])
+        self.assertEqual(messages, [MESSAGES[0][0], MESSAGES[1][0]])
+
+    def test_errors(self):
+        with open(self.path, 'ab') as f:  # a truncated message at the end
+            f.write(MESSAGES[0][0][:50])
+        with self.assertRaises(ValueError):
+            gt.scanMessages(self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(MESSAGES[0][0][:7] + bytes([1]) + MESSAGES[0][0][8:])  # GRIB1
+        with self.assertRaises(ValueError):
+            gt.scanMessages(self.path)
+
+    def test_decodeMessage(self):
+        for message, inventories in MESSAGES:
+            fields = gt.decodeMessage(message)
+            self.assertEqual(len(fields), len(inventories))
+            for field in fields:
+                np.testing.assert_allclose(field['lats'], GRIDLATS)
+                np.testing.assert_allclose(field['lons'], GRIDLONS)
+        fields = gt.decodeMessage(MESSAGES[3][0])
+        np.testing.assert_allclose(fields[0]['values'], makeValues(3), atol=1e-9)
+        np.testing.assert_allclose(fields[1]['values'], makeValues(4), atol=1e-9)
+
+        # south to north
+        message = makeMessage([(2, 2, 100, 85000, makeValues(0))], lats=GRIDLATS[::-1])
+        field = gt.decodeMessage(message)[0]
+        np.testing.assert_allclose(field['lats'], GRIDLATS[::-1])
+        np.testing.assert_allclose(field['values'], makeValues(0), atol=1e-9)
+
+    def test_readFields(self):
+        values, lats, lons = gt.readFields(self.path, gt.indexFile(self.path, [':UGRD:'])[':UGRD:'])
+        self.assertEqual(values.shape, (3, len(GRIDLATS), len(GRIDLONS)))  # 850 mb, 200 mb and 200 mb (2nd field)
+        np.testing.assert_allclose(values, [makeValues(0), makeValues(3), makeValues(4)], atol=1e-9)
+        np.testing.assert_allclose(lats, GRIDLATS)
+        np.testing.assert_allclose(lons, GRIDLONS)
+
+        with open(self.path, 'ab') as f:  # on a different grid
+            f.write(makeMessage([(2, 2, 100, 85000, makeValues(0))], lats=[20., 10., 0.]))
+        with self.assertRaises(ValueError):
+            gt.readFields(self.path)
+
+    def test_readFieldsOfComplexPacking(self):
+        expected = np.load(f'{DATADIR}/gribFixtures.npz')
+        for name in FIXTURES:
+            with self.subTest(name=name):
+                values, lats, lons = gt.readFields(f'{DATADIR}/{name}.grib2')
+                self.assertEqual(values.shape, (1, *expected[f'{name}_values'].shape))
+                np.testing.assert_array_equal(values[0], expected[f'{name}_values'])  # nan at the same points
+                np.testing.assert_allclose(lats, expected[f'{name}_lats'], atol=1e-9)
+                np.testing.assert_allclose(lons, expected[f'{name}_lons'], atol=1e-9)
+
+    def test_decodeErrors(self):
+        message, position = bytearray(MESSAGES[0][0]), 16
+        while message[position+4] != 5:  # to section 5
+            position += struct.unpack('>I', message[position:position+4])[0]
+        message[position+9:position+11] = struct.pack('>H', 40)  # JPEG2000
+        with self.assertRaises(ValueError):
+            gt.decodeMessage(bytes(message))
+
+
+if __name__ == '__main__':
+    unittest.main()
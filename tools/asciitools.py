@@ -0,0 +1,77 @@
+'''
+This module writes the numerical blocks in ASCII format,
+one row (the last dimension) per line, e.g., the BSISO output
+    L1: analysis t=1, y=1, x=1~49
+    ...
+
+The whole block is formatted by a single printf-style operation
+(the same format as f'{value:7.2f}' and ' '.join, byte by byte),
+and the file is written to a hidden temp file in the same directory
+and renamed when completed, so the readers never see a half-written file.
+
+The files are read back by readRows (readBsiso for the BSISO output),
+parsed by np.loadtxt in C instead of float() for each token.
+'''
+import os
+import numpy as np
+
+
+def formatRows(data: np.array, fmt: str = '%7.2f', sep: str = ' ') -> str:
+    '''
+    format data (reshaped to rows of the last dimension) as lines,
+    identical to the loop
+        for row in rows: sep.join([f'{value:7.2f}' for value in row]) + '\\n'
+    '''
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 0:
+        data = data.reshape(1)
+    rows = data.reshape(-1, data.shape[-1])
+    numRows, numCols = rows.shape
+    if numRows == 0 or numCols == 0:
+        return '\n' * numRows
+    lineFormat = sep.join([fmt] * numCols) + '\n'
+    return (lineFormat * numRows) % tuple(rows.ravel().tolist())
+
+
+def writeRows(fileName: str, blocks: list, fmt: str = '%7.2f', sep: str = ' '):
+    '''write the blocks in order (see formatRows), atomically'''
+    # hidden (not matched by the readers' globs) and unique per process (concurrent writers)
+    dirName, baseName = os.path.split(os.path.abspath(fileName))
+    tmpName = f'{dirName}/.{baseName}.{os.getpid()}.tmp'
+    try:
+        with open(tmpName, 'wt') as f:
+            for block in blocks:
+                f.write(formatRows(block, fmt, sep))
+        os.replace(tmpName, fileName)
+    finally:
+        if os.path.exists(tmpName):  # failed before the rename
+            os.remove(tmpName)
+
+
+def readRows(fileName: str, numCols: int) -> np.array:
+    '''the rows written by writeRows, shape = (numRows, numCols)'''
+    data = np.loadtxt(fileName, dtype=float, ndmin=2)  # parsed in C, the same values as float(token)
+    if data.size == 0:
+        return data.reshape(0, numCols)
+    if data.shape[1] != numCols:
+        raise ValueError(f'{fileName} has {data.shape[1]} values per line, expected {numCols=}')
+    return data
+
+
+def readBsiso(
+    fileName: str, numLats: int = 21, numLons: int = 49,
+    numAnalysis: int = 120, numForecasts: int = 3, numLeads: int = 40,
+) -> tuple[np.array, np.array]:
+    '''
+    the BSISO output of 2_nc2ascii.py (see README.txt) as the views of one array,
+    analysis (numAnalysis, numLats, numLons) and forecast (numForecasts, numLeads, numLats, numLons)
+    '''
+    data = readRows(fileName, numLons)
+    numRows = (numAnalysis + numForecasts * numLeads) * numLats
+    if data.shape[0] != numRows:
+        raise ValueError(f'{fileName} has {data.shape[0]} rows, expected {numRows}')
+
+    numAnalysisRows = numAnalysis * numLats
+    analysis = data[:numAnalysisRows].reshape(numAnalysis, numLats, numLons)
+    forecast = data[numAnalysisRows:].reshape(numForecasts, numLeads, numLats, numLons)
+    return analysis, forecast
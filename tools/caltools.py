@@ -1,4 +1,5 @@
 import numpy as np
+from functools import lru_cache
 
 def bootstrapResampling(data, numSamples, axis=0):
     data = np.swapaxes(data, 0, axis)
@@ -86,16 +87,24 @@ def w2g(LON, lon_s, lon_e):
     return xs, xe, nx, lon
 
 
-def value2Slice(valueList, valueStart, valueEnd):
+def value2Slice(valueList, valueStart, valueEnd, checkIncreasing=True):
+    '''
+    the slice of valueList (strictly increasing) within [valueStart, valueEnd],
+    None for no limit.
+    checkIncreasing: False to skip the check if valueList is known to be increasing
+    '''
     #
     # ---- checking inputs ---- #
     if not isinstance(valueList, (list, np.ndarray)):
         raise TypeError('"valueList" must be a list.')
 
-    valueList = list(valueList)
+    valueList = np.asarray(valueList)
 
-    for valueSmall, valueBig in zip(valueList, valueList[1:]):
-        if valueSmall >= valueBig:
+    if checkIncreasing:
+        isNotIncreasing = np.diff(valueList) <= 0
+        if np.any(isNotIncreasing):
+            iSmall = int(np.argmax(isNotIncreasing))
+            valueSmall, valueBig = valueList[iSmall], valueList[iSmall+1]
             raise ValueError(
                 'values in "valueList" must be strictly increasing. '
                 f'({valueSmall=}, {valueBig=})'
@@ -125,103 +134,168 @@ def value2Slice(valueList, valueStart, valueEnd):
             f'The inquired "valueEnd" is smaller than the entire list: '
             f'{valueEnd=} < {valueList[0]=}'
         )
-    # TODO: is the element numeric?
-    # for e in valueList:
-    #     if not isinstance(e, (int, float)):
-    #         raise TypeError('values in "valueList" must be integers or float.')
 
     #
-    # ---- get sliceStart and sliceEnd ----
-    for sliceStart, value in enumerate(valueList):
-        if value >= valueStart:
-            break
-    for reversedSliceEnd, value in enumerate(valueList[::-1]):
-        if value <= valueEnd:
-            break
+    # ---- get sliceStart and sliceEnd by binary search ----
+    # the first value >= valueStart, and after the last value <= valueEnd
+    sliceStart = int(np.searchsorted(valueList, valueStart, side='left'))
+    sliceEnd = int(np.searchsorted(valueList, valueEnd, side='right'))
+
+    return slice(sliceStart, sliceEnd)
+
+
+class Interp1dPlan:
+    '''
+    The linear interpolation from x to x_new (both 1-d, strictly increasing),
+    with the indices and weights computed once for all the arrays on the same grids:
+
+        plan = Interp1dPlan(x, x_new, extrapolate=True)
+        y_new = plan(y, axis=-1)
+
+    y_new = y[ixl] + weight * (y[ixl+1] - y[ixl]) along the axis
+    '''
+
+    def __init__(self, x, x_new, extrapolate=False):
+        x = np.array(x, dtype=np.double)
+        x_new = np.array(x_new, dtype=np.double)
+
+        if x.ndim > 1:
+            raise Exception(f'x.ndim must be 1 but input is {x.ndim}')
+        if x_new.ndim > 1:
+            raise Exception(f'x_new.ndim must be 1 but input is {x_new.ndim}')
+        if np.any(np.diff(x) <= 0):
+            raise Exception('x must be strictly increasing.')
+        if np.any(np.diff(x_new) <= 0):
+            raise Exception('x_new must be strictly increasing.')
+        if not extrapolate and np.min(x_new) < np.min(x):
+            raise Exception('min(x_new) must >= min(x)')
+        if not extrapolate and np.max(x_new) > np.max(x):
+            raise Exception('max(x_new) must <= max(x)')
+
+        self.x = x
+        self.x_new = x_new
+        self.isIdentity = np.array_equal(x, x_new)  # no need to interpolate
+
+        # x[ixl] < x_new <= x[ixl+1], clipped to the first/last interval for extrapolation
+        nx = len(x)
+        self.ixl = np.clip(np.searchsorted(x, x_new, side='left') - 1, 0, nx - 2)
+        self.ixr = self.ixl + 1
+        self.weight = (x_new - x[self.ixl]) / (x[self.ixr] - x[self.ixl])
+
+    def __call__(self, y, axis=0):
+        y = np.array(y, dtype=np.double)
+        if self.isIdentity:
+            return y
+
+        if axis != 0:
+            y = np.swapaxes(y, 0, axis)
+        if len(self.x) != y.shape[0]:
+            raise Exception(f'len(x) must be the same as y.shape[0]')
+
+        weight = self.weight.reshape(-1, *[1] * (y.ndim - 1))  # for broadcasting
+        y_new = weight * (y[self.ixr] - y[self.ixl])
+        y_new += y[self.ixl]
+
+        if axis != 0:
+            y_new = np.swapaxes(y_new, 0, axis)
+        return y_new
+
+
+@lru_cache(maxsize=64)  # a few pairs of grids in use, bounded for the long-running service
+def _getInterp1dPlan(x: bytes, xShape: tuple, x_new: bytes, x_newShape: tuple, extrapolate: bool):
+    return Interp1dPlan(
+        np.frombuffer(x).reshape(xShape), np.frombuffer(x_new).reshape(x_newShape), extrapolate
+    )
 
-    return slice(sliceStart, len(valueList)-reversedSliceEnd)
+
+def getInterp1dPlan(x, x_new, extrapolate=False):
+    '''the Interp1dPlan of (x, x_new), cached for each pair of grids (the least recently used dropped)'''
+    x, x_new = np.array(x, dtype=np.double), np.array(x_new, dtype=np.double)
+    return _getInterp1dPlan(x.tobytes(), x.shape, x_new.tobytes(), x_new.shape, bool(extrapolate))
 
 
 def interp_1d(x, y, x_new, axis=0, extrapolate=False):
     '''
     This function interpolates the nd-array y(x) to y(x_new)
-    along the left-most axis.
-    x is an 1-d array, with the same length as the first dimension 
-    of y.
+    along the axis (the left-most by default).
+    x is an 1-d array, with the same length as the dimension
+    of y at the axis.
+    The indices and weights are cached (see getInterp1dPlan),
+    so interpolating many arrays on the same grids is cheap.
     '''
-    def strictly_increasing(L): return all(e1 < e2 for e1, e2 in zip(L, L[1:]))
-
-    x = np.array(x, dtype=np.double)
-    y = np.array(y, dtype=np.double)
-    x_new = np.array(x_new, dtype=np.double)
-
-    if np.array_equal(x, x_new):  # no need to interpolate
-        return y
-
-    if axis != 0:
-        y = np.swapaxes(y, 0, axis)
-    if x.ndim > 1:
-        raise Exception(f'x.ndim must be 1 but input is {x.ndim}')
-    if x_new.ndim > 1:
-        raise Exception(f'x_new.ndim must be 1 but input is {x_new.dim}')
-    if len(x) != y.shape[0]:
-        raise Exception(f'len(x) must be the same as y.shape[0]')
-    if not strictly_increasing(x):
-        raise Exception('x must be strictly increasing.')
-    if not strictly_increasing(x_new):
-        raise Exception('x_new must be strictly increasing.')
-    if not extrapolate and np.min(x_new) < np.min(x):
-        raise Exception('min(x_new) must >= min(x)')
-    if not extrapolate and np.max(x_new) > np.max(x):
-        raise Exception('min(x_new) must <= min(x)')
-
-    nx = len(x)
-    nx_new = len(x_new)
-
-    # find index of x to interpolate
-    ixl = np.zeros((nx_new,), dtype=np.int32)
-    ixr = np.zeros((nx_new,), dtype=np.int32)
-
-    for ix_new in range(nx_new):
-        dx = np.array(x_new[ix_new] - x)
-
-        if extrapolate:
-            if x_new[ix_new] < x[0]:
-                ixl[ix_new] = 0
-                continue
-            if x_new[ix_new] > x[-1]:
-                ixl[ix_new] = nx - 2
-                continue
-
-        # check the exact same grid
-        ix = np.where(dx == 0)[0]
-        if len(ix) and ix == 0:
-            ixl[ix_new] = ix
-            continue
-        if len(ix) and ix != 0:
-            ixl[ix_new] = ix-1
-            continue
+    return getInterp1dPlan(x, x_new, extrapolate)(y, axis)
 
-        # find the intersection
-        ix = np.where(dx < 0)[0][0]
-        ixl[ix_new] = ix-1
 
-    ixr = ixl + 1
+def getBilinearWeights(srcLon, srcLat, dstLon, dstLat):
+    '''
+    The bilinear weights from a global rectilinear grid (srcLon, srcLat)
+    to the target points (dstLon, dstLat), periodic in longitude.
+    The weights are cached for each pair of grids (the least recently used dropped).
+
+    return (iLat0, iLat1, wLat, iLon0, iLon1, wLon) so that
+    y(dstLat, dstLon) = (1-wLat) * ((1-wLon) * y[iLat0, iLon0] + wLon * y[iLat0, iLon1])
+                      + wLat * ((1-wLon) * y[iLat1, iLon0] + wLon * y[iLat1, iLon1])
+    '''
+    key = []
+    for v in [srcLon, srcLat, dstLon, dstLat]:
+        v = np.array(v, dtype=np.double)
+        key += [v.tobytes(), v.shape]
+    return _getBilinearWeights(*key)
+
+
+@lru_cache(maxsize=16)  # a few pairs of grids in use, bounded for the long-running service
+def _getBilinearWeights(
+    srcLon: bytes, srcLonShape: tuple, srcLat: bytes, srcLatShape: tuple,
+    dstLon: bytes, dstLonShape: tuple, dstLat: bytes, dstLatShape: tuple,
+):
+    srcLon, srcLat, dstLon, dstLat = [
+        np.frombuffer(v).reshape(shape) for v, shape in [
+            (srcLon, srcLonShape), (srcLat, srcLatShape), (dstLon, dstLonShape), (dstLat, dstLatShape),
+        ]
+    ]
+    if srcLon.ndim != 1 or srcLat.ndim != 1:
+        raise ValueError('only support rectilinear grids (1-d srcLon and srcLat)')
+
+    def weights(x, xNew):  # x is strictly increasing
+        i1 = np.clip(np.searchsorted(x, xNew, side='left'), 1, len(x)-1)
+        i0 = i1 - 1
+        w = np.clip((xNew - x[i0]) / (x[i1] - x[i0]), 0, 1)  # no extrapolation
+        return i0, i1, w
+
+    # ---- latitude, the source can be in either order
+    order = np.argsort(srcLat)
+    iLat0, iLat1, wLat = weights(srcLat[order], dstLat)
+    iLat0, iLat1 = order[iLat0], order[iLat1]
+
+    # ---- longitude, wrap the source to [0, 360) and append the cyclic point
+    lon = np.mod(srcLon, 360)
+    order = np.argsort(lon)
+    iLon0, iLon1, wLon = weights(
+        np.concatenate((lon[order], lon[order[:1]] + 360)),
+        np.mod(dstLon - lon[order[0]], 360) + lon[order[0]],
+    )
+    order = np.concatenate((order, order[:1]))
+    iLon0, iLon1 = order[iLon0], order[iLon1]
 
-    # interpolation to y_new
-    y_new = x_new - x[ixl]
-    y_new /= x[ixr] - x[ixl]
+    return iLat0, iLat1, wLat, iLon0, iLon1, wLon
 
-    y_new = np.tile(y_new, [1 for i in range(y.ndim)])  # for broadcasting
-    if y_new.ndim != 1:
-        y_new = np.swapaxes(y_new, 0, y_new.ndim-1)  # for broadcasting
 
-    y_new = y_new * (y[ixr, :] - y[ixl, :])
-    y_new += y[ixl]
+def regridBilinear(data, srcLon, srcLat, dstLon, dstLat):
+    '''
+    Bilinearly regrid data[..., srcLat, srcLon] to data[..., dstLat, dstLon].
+    Only the target points are computed, so a regional target (dstLon, dstLat)
+    doesn't need the global field to be regridded first.
+    '''
+    iLat0, iLat1, wLat, iLon0, iLon1, wLon = getBilinearWeights(
+        srcLon, srcLat, dstLon, dstLat
+    )
+    data = np.array(data, dtype=np.double)
+    if data.shape[-2:] != (len(srcLat), len(srcLon)):
+        raise ValueError(f'{data.shape=} is inconsistent with ({len(srcLat)=}, {len(srcLon)=})')
 
-    if axis != 0:
-        y_new = np.swapaxes(y_new, 0, axis)
-    return y_new
+    wLat = wLat[:, None]
+    rows = (1 - wLat) * data[..., iLat0, :] + wLat * data[..., iLat1, :]
+    return (1 - wLon) * rows[..., iLon0] + wLon * rows[..., iLon1]
 
 
 def scores_2d(forecast, observation, lat):
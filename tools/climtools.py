@@ -0,0 +1,187 @@
+'''
+This module prepares the climatologies in the forms read by 2_nc2ascii.py.
+
+---- model clim
+It packs the per-calendar-day model climatology files,
+    one file per variable and %m%d, var(lead, lat, lon)
+into one compact store cropped to a box, and reads it back by memory mapping,
+so the model clim of many init dates is read by indexing in memory
+instead of opening a file for each init date.
+
+    {storePath}.npy: (numVars, 366, numLeads, numLats, numLons)
+        indexed by (iVar, dayOfYear229-1, iLead, iLat, iLon)
+    {storePath}.json: meta = {
+      'varNames': [...],
+      'leads': [...],  # the lead values
+      'lats': [...],  # increasing
+      'lons': [...],  # increasing
+      'sources': {varName: [[path, mtime, size], ... (366 days)]},
+    }
+
+---- obs clim
+The 365-day obs clim is cropped, expanded to 366 days (Feb 29 = the mean
+of Feb 28 and Mar 1), and cached as a .npy file (+ .json), which is
+memory mapped by the next runs and rebuilt if the source file is changed.
+'''
+import json
+import os
+import numpy as np
+from . import timetools as tt
+from . import nctools as nct
+
+
+def getClimDates() -> list:
+    '''366 dates (of the leap year 2000), the i-th date has dayOfYear229 = i+1'''
+    return [tt.ymd2int(2000, 1, 1) + i for i in range(366)]
+
+
+def expandTo366(clim365: np.array) -> np.array:
+    '''365 days -> 366 days (dayOfYear229), Feb 29 = the mean of Feb 28 and Mar 1'''
+    i228 = tt.ymd2int(2001, 2, 28) - tt.ymd2int(2001, 1, 1)
+    i301 = tt.ymd2int(2001, 3, 1) - tt.ymd2int(2001, 1, 1)
+    return np.concatenate(
+        (clim365[:i228+1, :],
+         0.5 * (clim365[i228, :]+clim365[i301, :])[None, :, :],
+         clim365[i301:, :]),
+        axis=0,
+    )
+
+
+def loadObsClim366(path: str, varName: str, minMaxs: list[list], cachePath: str) -> np.array:
+    '''
+    the obs clim of path cropped by minMaxs (as nct.ncreadByDimRange) and
+    expanded to 366 days, memory mapped from cachePath (.npy),
+    which is (re)built if path or minMaxs is changed
+    '''
+    meta = {'source': _getSourceStat(path), 'varName': varName, 'minMaxs': minMaxs}
+    try:
+        with open(f'{cachePath}.json', 'rt') as f:
+            if json.load(f) == meta:
+                return np.load(cachePath, mmap_mode='r')
+    except (OSError, ValueError):
+        pass  # build the cache
+
+    clim365, __ = nct.ncreadByDimRange(path, varName, minMaxs)
+    clim366 = expandTo366(clim365)
+
+    try:
+        tmpName = f'{cachePath}.{os.getpid()}.tmp'
+        with open(tmpName, 'wb') as f:
+            np.save(f, clim366)
+        os.replace(tmpName, cachePath)
+        with open(f'{tmpName}.json', 'wt') as f:
+            json.dump(meta, f)
+        os.replace(f'{tmpName}.json', f'{cachePath}.json')
+    except OSError as e:  # e.g., no writing permission, still usable without the cache
+        print(e)
+        return clim366
+
+    return np.load(cachePath, mmap_mode='r')
+
+
+def _getSourceStat(path):
+    stat = os.stat(path)
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+def pack(storePath: str, varNames: list, getPath, minMaxs: list[list]):
+    '''
+    pack the model clim files getPath(date, varName) of the 366 days
+    into the store, cropped by minMaxs = [[leadMin, leadMax], [latMin, latMax], [lonMin, lonMax]]
+    (same as nct.ncreadByDimRange)
+    '''
+    dates = getClimDates()
+    data, coords = None, None
+    sources = {varName: [] for varName in varNames}
+
+    tmpName = f'{storePath}.npy.tmp'
+    for iVar, varName in enumerate(varNames):
+        for iDay, date in enumerate(dates):
+            path = getPath(date, varName)
+            sources[varName].append(_getSourceStat(path))
+            values, dimensions = nct.ncreadByDimRange(path, varName, minMaxs, decodeTime=False)
+
+            if data is None:
+                coords = [np.array(dim) for dim in dimensions]
+                data = np.lib.format.open_memmap(
+                    tmpName, mode='w+', dtype=values.dtype,
+                    shape=(len(varNames), len(dates), *values.shape),
+                )
+            elif any([not np.array_equal(dim, coord) for dim, coord in zip(dimensions, coords)]):
+                raise ValueError(f'the coordinates of {path=} are different from the other files')
+
+            data[iVar, iDay, :] = values
+
+    data.flush()
+    del data
+    os.replace(tmpName, f'{storePath}.npy')
+
+    meta = {
+        'varNames': list(varNames),
+        'leads': coords[0].tolist(),
+        'lats': coords[1].tolist(),
+        'lons': coords[2].tolist(),
+        'sources': sources,
+    }
+    with open(f'{storePath}.json.tmp', 'wt') as f:
+        json.dump(meta, f)
+    os.replace(f'{storePath}.json.tmp', f'{storePath}.json')
+
+
+class ModelClimStore:
+    '''
+    The packed model clim, memory mapped:
+
+        store = ModelClimStore(storePath)
+        if store.isUpToDate(initTimes):
+            clim = store.read(varName, initTimes, leads)
+    '''
+
+    def __init__(self, storePath: str):
+        with open(f'{storePath}.json', 'rt') as f:
+            meta = json.load(f)
+        self.varNames = meta['varNames']
+        self.leads = np.array(meta['leads'])
+        self.lats = np.array(meta['lats'])
+        self.lons = np.array(meta['lons'])
+        self.sources = meta['sources']
+        self.data = np.load(f'{storePath}.npy', mmap_mode='r')
+
+        self._iLeads = {lead: iLead for iLead, lead in enumerate(self.leads.tolist())}
+
+    def isUpToDate(self, initTimes: list = None) -> bool:
+        '''whether the source files of the days of initTimes (all days if None) are unchanged'''
+        if initTimes is None:
+            iDays = range(366)
+        else:
+            iDays = set((tt.dayOfYear229Array(np.trunc(initTimes)) - 1).tolist())
+
+        for varName in self.varNames:
+            for iDay in iDays:
+                path, mtime, size = self.sources[varName][iDay]
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    return False
+                if stat.st_mtime_ns != mtime or stat.st_size != size:
+                    return False
+        return True
+
+    def read(self, varName: str, initTimes, leads) -> np.array:
+        '''
+        the model clim of the (broadcasted) initTimes and leads,
+        shape = (*broadcastedShape, numLats, numLons)
+        '''
+        if varName not in self.varNames:
+            raise ValueError(f'{varName=} not in the store ({self.varNames})')
+
+        initTimes, leads = np.broadcast_arrays(np.asarray(initTimes), np.asarray(leads))
+        iDays = tt.dayOfYear229Array(np.trunc(initTimes)) - 1
+        try:
+            iLeads = np.array(
+                [self._iLeads[lead] for lead in leads.ravel().tolist()], dtype=int
+            ).reshape(leads.shape)
+        except KeyError as e:
+            raise ValueError(f'lead={e.args[0]} not in the store') from e
+
+        return np.array(self.data[self.varNames.index(varName)][iDays, iLeads])
@@ -0,0 +1,431 @@
+'''
+This module locates the messages in GRIB2 files without wgrib2.
+
+Only the section headers are read (the data sections are skipped),
+and each message is described by a short wgrib2-like inventory,
+    "{recordNumber}:{offset}:d={YYYYMMDDHH}:{name}:{level}:"
+e.g.,
+    "12:3504318:d=2025030900:UGRD:850 mb:"
+so the same matchers as wgrib2 -match (e.g., ':UGRD:850 mb:')
+can be used to find the messages, and the messages can be copied
+byte by byte to build a new GRIB2 file.
+
+Note:
+    Only the common parameter names and level types are known,
+    the others are named as "var{discipline}_{category}_{number}"
+    and "level{type}={value}".
+    Messages with multiple fields are listed as "n.1", "n.2", ...,
+    and share the offset and size of the whole message.
+
+The data of the messages can be decoded (decodeMessage, readFields)
+for the grids and packings of the CFSv2 daily mean files:
+    grid: regular lat-lon (template 3.0) and Gaussian (3.40)
+    packing: simple (5.0), complex (5.2), complex with spatial differencing (5.3),
+             with or without a bitmap
+the others (e.g., JPEG2000) raise ValueError.
+'''
+import os
+import re
+from functools import lru_cache
+import numpy as np
+
+
+_NAMES = {  # (discipline, category, number): name, following wgrib2
+    (0, 0, 0): 'TMP',
+    (0, 0, 2): 'POT',
+    (0, 1, 0): 'SPFH',
+    (0, 1, 1): 'RH',
+    (0, 1, 3): 'PWAT',
+    (0, 1, 7): 'PRATE',
+    (0, 1, 8): 'APCP',
+    (0, 2, 0): 'WDIR',
+    (0, 2, 1): 'WIND',
+    (0, 2, 2): 'UGRD',
+    (0, 2, 3): 'VGRD',
+    (0, 2, 4): 'STRM',
+    (0, 2, 5): 'VPOT',
+    (0, 2, 8): 'VVEL',
+    (0, 2, 10): 'ABSV',
+    (0, 2, 12): 'RELV',
+    (0, 3, 0): 'PRES',
+    (0, 3, 1): 'PRMSL',
+    (0, 3, 4): 'GP',
+    (0, 3, 5): 'HGT',
+    (0, 4, 7): 'DSWRF',
+    (0, 4, 8): 'USWRF',
+    (0, 5, 3): 'DLWRF',
+    (0, 5, 4): 'ULWRF',
+    (0, 6, 1): 'TCDC',
+    (2, 0, 0): 'LAND',
+    (10, 3, 0): 'WTMP',
+}
+
+_LEVELS = {  # type of fixed surface: level, following wgrib2
+    1: 'surface',
+    8: 'top of atmosphere',
+    101: 'mean sea level',
+    200: 'entire atmosphere (considered as a single layer)',
+}
+
+
+def _uint(b): return int.from_bytes(b, 'big')
+
+
+def _sint(b):  # GRIB2 uses the sign bit + magnitude for signed integers
+    value = _uint(b)
+    signBit = 1 << (8 * len(b) - 1)
+    if value & signBit:
+        return -(value & (signBit - 1))
+    return value
+
+
+def _getName(discipline, section4):
+    category, number = section4[9], section4[10]
+    name = _NAMES.get((discipline, category, number))
+    if name is None:
+        name = f'var{discipline}_{category}_{number}'
+    return name
+
+
+def _getLevel(section4):
+    levelType = section4[22]
+    scaleFactor, scaledValue = section4[23:24], section4[24:28]
+
+    if levelType in _LEVELS:
+        return _LEVELS[levelType]
+
+    if scaledValue == b'\xff' * 4:  # missing
+        value = None
+    else:
+        value = _sint(scaledValue) / 10 ** _sint(scaleFactor)
+
+    if levelType == 100 and value is not None:
+        return f'{value / 100:g} mb'
+    if levelType == 102 and value is not None:
+        return f'{value:g} m above mean sea level'
+    if levelType == 103 and value is not None:
+        return f'{value:g} m above ground'
+    return f'level{levelType}={value}'
+
+
+def scanMessages(fileName: str, start: int = 0, length: int = None) -> list:
+    '''
+    Scan the GRIB2 messages in fileName[start:start+length]
+    (length=None for the end of file).
+    Return a list of records with the keys
+        recordNumber, offset (in fileName), size, inventory
+    '''
+    if length is None:
+        length = os.path.getsize(fileName) - start
+    end = start + length
+
+    records = []
+    with open(fileName, 'rb') as f:
+        offset, iMessage = start, 0
+        while offset < end:
+            f.seek(offset)
+            section0 = f.read(16)
+            if len(section0) == 0:
+                break
+            if len(section0) < 16 or section0[:4] != b'GRIB':
+                raise ValueError(f'GRIB message not found at {offset=} in {fileName=}')
+            if section0[7] != 2:
+                raise ValueError(
+                    f'only GRIB edition 2 is supported, got {section0[7]} at {offset=} in {fileName=}'
+                )
+
+            iMessage += 1
+            discipline = section0[6]
+            size = _uint(section0[8:16])
+            messageEnd = offset + size
+            if messageEnd > end:
+                raise ValueError(f'truncated GRIB message at {offset=} in {fileName=}')
+
+            #
+            # ---- walk through the sections, only reading 1 and 4
+            date, fields = None, []
+            position = offset + 16
+            while position < messageEnd:
+                f.seek(position)
+                header = f.read(5)
+                if header[:4] == b'7777':
+                    break
+                sectionLength, sectionNumber = _uint(header[:4]), header[4]
+                if sectionLength < 5:
+                    raise ValueError(f'bad section length at {position=} in {fileName=}')
+
+                if sectionNumber == 1:
+                    section1 = header + f.read(sectionLength - 5)
+                    year, month, day, hour = _uint(section1[12:14]), *section1[14:17]
+                    date = f'{year:04d}{month:02d}{day:02d}{hour:02d}'
+                elif sectionNumber == 4:
+                    section4 = header + f.read(sectionLength - 5)
+                    fields.append(f'{_getName(discipline, section4)}:{_getLevel(section4)}')
+                position += sectionLength
+
+            for iField, field in enumerate(fields):
+                recordNumber = f'{iMessage}' if len(fields) == 1 else f'{iMessage}.{iField+1}'
+                records.append({
+                    'recordNumber': recordNumber,
+                    'offset': offset,
+                    'size': size,
+                    'inventory': f'{recordNumber}:{offset}:d={date}:{field}:',
+                })
+
+            offset = messageEnd
+
+    return records
+
+
+def matchRecords(records: list, matcher: str) -> list:
+    '''the records whose inventory matches the regular expression (like wgrib2 -match)'''
+    pattern = re.compile(matcher)
+    return [record for record in records if pattern.search(record['inventory'])]
+
+
+def indexFile(fileName: str, matchers: list, start: int = 0, length: int = None) -> dict:
+    '''scan fileName once and return {matcher: [matched records]}'''
+    records = scanMessages(fileName, start, length)
+    return {matcher: matchRecords(records, matcher) for matcher in matchers}
+
+
+def readRecords(fileName: str, records: list) -> list:
+    '''read the raw bytes of the messages of the records'''
+    messages = []
+    with open(fileName, 'rb') as f:
+        for record in records:
+            f.seek(record['offset'])
+            message = f.read(record['size'])
+            if len(message) != record['size']:
+                raise ValueError(f'unable to read {record=} from {fileName=}')
+            messages.append(message)
+    return messages
+
+
+# ---- ---- decoding the data ---- ---- #
+def decodeMessage(message: bytes) -> list:
+    '''
+    decode the fields of a GRIB2 message,
+    return [{'lats': (ny,), 'lons': (nx,), 'values': (ny, nx)}, ...] (one per field),
+    the values are in the scanning order of the grid, nan for the masked points
+    '''
+    if message[:4] != b'GRIB' or message[7] != 2:
+        raise ValueError('not a GRIB2 message')
+
+    fields, grid, dataRepresentation, bitmap = [], None, None, None
+    position = 16
+    while position < len(message) and message[position:position+4] != b'7777':
+        sectionLength, sectionNumber = _uint(message[position:position+4]), message[position+4]
+        if sectionLength < 5:
+            raise ValueError(f'bad section length at {position=}')
+        section = message[position:position+sectionLength]
+
+        if sectionNumber == 3:
+            grid = _getGrid(section)
+        elif sectionNumber == 5:
+            dataRepresentation = section
+        elif sectionNumber == 6:
+            if section[5] == 0:
+                bitmap = np.unpackbits(np.frombuffer(section[6:], dtype=np.uint8)).astype(bool)
+            elif section[5] == 255:
+                bitmap = None
+            elif section[5] != 254:  # 254: the previous bitmap
+                raise ValueError(f'bitmap indicator {section[5]} is not supported')
+        elif sectionNumber == 7:
+            if grid is None or dataRepresentation is None:
+                raise ValueError('data section before the grid or data representation section')
+            lats, lons, transposed = grid
+            numPoints = len(lats) * len(lons)
+            values = _unpackData(dataRepresentation, section[5:])
+
+            if bitmap is not None:
+                bitmapped = np.full(numPoints, np.nan)
+                bitmapped[bitmap[:numPoints]] = values
+                values = bitmapped
+            if values.size != numPoints:
+                raise ValueError(f'{values.size} values for the grid of {numPoints} points')
+
+            if transposed:  # adjacent points in the j direction
+                values = values.reshape(len(lons), len(lats)).T
+            fields.append({'lats': lats, 'lons': lons, 'values': values.reshape(len(lats), len(lons))})
+        position += sectionLength
+
+    return fields
+
+
+def readFields(fileName: str, records: list = None) -> tuple:
+    '''
+    decode all the fields of the messages in the file (or the records of indexFile),
+    which must be on the same grid,
+    return (values (numFields, ny, nx), lats, lons)
+    '''
+    if records is None:
+        records = scanMessages(fileName)
+    records = list({record['offset']: record for record in records}.values())  # once per message
+
+    fields = [
+        field for message in readRecords(fileName, records)
+        for field in decodeMessage(message)
+    ]
+    if not fields:
+        raise ValueError(f'no fields in {fileName=}')
+    lats, lons = fields[0]['lats'], fields[0]['lons']
+    for field in fields[1:]:
+        if not (np.array_equal(field['lats'], lats) and np.array_equal(field['lons'], lons)):
+            raise ValueError(f'the fields in {fileName=} are on different grids')
+    return np.array([field['values'] for field in fields]), lats, lons
+
+
+def _getGrid(section3):
+    '''(lats, lons, transposed) of the grid definition section'''
+    templateNumber = _uint(section3[12:14])
+    if templateNumber not in [0, 40]:
+        raise ValueError(f'grid template 3.{templateNumber} is not supported')
+    if section3[10] != 0:
+        raise ValueError('quasi-regular grids are not supported')
+
+    ni, nj = _uint(section3[30:34]), _uint(section3[34:38])
+    basicAngle, subdivisions = _uint(section3[38:42]), _uint(section3[42:46])
+    unit = 1e-6
+    if basicAngle not in [0, 0xffffffff] and subdivisions not in [0, 0xffffffff]:
+        unit = basicAngle / subdivisions
+    la1, lo1 = _sint(section3[46:50]) * unit, _sint(section3[50:54]) * unit
+    la2, lo2 = _sint(section3[55:59]) * unit, _sint(section3[59:63]) * unit
+    di = _uint(section3[63:67])
+    scanningMode = section3[71]
+    if scanningMode & 0x10:
+        raise ValueError('the boustrophedonic scanning is not supported')
+
+    # ---- longitudes from the first and last points as eccodes, the increment may be rounded
+    # ---- the i direction is +x unless bit 1 is set
+    iSign = -1 if scanningMode & 0x80 else 1
+    span = ((lo2 - lo1) * iSign) % 360
+    if span == 0 and ni > 1 and di != 0xffffffff:
+        span = di * unit * (ni - 1)
+    lons = np.linspace(lo1, lo1 + iSign * span, ni)
+
+    # ---- latitudes, the j direction is -y unless bit 2 is set
+    if templateNumber == 0:
+        lats = np.linspace(la1, la2, nj)
+    else:  # Gaussian, N = the number of parallels between a pole and the equator
+        gaussianLats = _getGaussianLats(_uint(section3[67:71]))  # north to south
+        if scanningMode & 0x40:
+            gaussianLats = gaussianLats[::-1]
+        iFirst = int(np.argmin(np.abs(gaussianLats - la1)))
+        lats = gaussianLats[iFirst:iFirst+nj]
+        if len(lats) != nj:
+            raise ValueError(f'the Gaussian grid has no {nj} latitudes from {la1=}')
+
+    return lats, lons, bool(scanningMode & 0x20)
+
+
+@lru_cache(maxsize=8)
+def _getGaussianLats(n):
+    '''the 2n Gaussian latitudes (degrees), north to south'''
+    nodes, __ = np.polynomial.legendre.leggauss(2 * n)
+    return np.degrees(np.arcsin(nodes))[::-1]
+
+
+def _readBits(data: bytes, bitPositions, widths):
+    '''the unsigned integers of widths (<= 32) bits at bitPositions of data'''
+    bitPositions = np.asarray(bitPositions, dtype=np.int64)
+    widths = np.broadcast_to(np.asarray(widths, dtype=np.uint64), bitPositions.shape)
+    if bitPositions.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    buffer = np.frombuffer(data + bytes(8), dtype=np.uint8)
+    if (bitPositions[-1] + int(widths[-1]) + 7) // 8 > len(data) + 8:
+        raise ValueError('the data section is too short')
+    words = buffer[bitPositions[:, None] // 8 + np.arange(8)].view('>u8')[:, 0].astype(np.uint64)
+    shifts = np.uint64(64) - (bitPositions % 8).astype(np.uint64) - widths
+    return (words >> shifts) & ((np.uint64(1) << widths) - np.uint64(1))
+
+
+def _unpackData(section5, data):
+    '''the values (nan for the missing values) of the data section by the packing of section 5'''
+    numValues, templateNumber = _uint(section5[5:9]), _uint(section5[9:11])
+    if templateNumber not in [0, 2, 3]:
+        raise ValueError(f'data template 5.{templateNumber} is not supported')
+
+    reference = float(np.frombuffer(section5[11:15], dtype='>f4')[0])
+    binaryScale, decimalScale = _sint(section5[15:17]), _sint(section5[17:19])
+    numBits = section5[19]
+    if numBits > 32:
+        raise ValueError(f'{numBits=} is not supported')
+
+    if templateNumber == 0:
+        packed = _readBits(data, np.arange(numValues) * numBits, numBits)
+        isMissing = np.zeros(numValues, dtype=bool)
+    else:
+        packed, isMissing = _unpackComplex(section5, data, numValues, numBits)
+
+    values = np.full(numValues, np.nan)
+    values[~isMissing] = (reference + packed.astype(np.float64) * 2.0**binaryScale) / 10.0**decimalScale
+    return values
+
+
+def _unpackComplex(section5, data, numValues, numBits):
+    '''the packed integers and the missing mask of complex packing (5.2, 5.3)'''
+    missingManagement = section5[22]
+    numGroups = _uint(section5[31:35])
+    widthReference, widthBits = section5[35], section5[36]
+    lengthReference, lengthIncrement = _uint(section5[37:41]), section5[41]
+    lastLength, lengthBits = _uint(section5[42:46]), section5[46]
+
+    # ---- 5.3: the first values and the minimum of the spatial differences
+    byteOffset, firsts, minimum, order = 0, [], 0, 0
+    if _uint(section5[9:11]) == 3:
+        order, numOctets = section5[47], section5[48]
+        if order not in [1, 2]:
+            raise ValueError(f'spatial differencing of {order=} is not supported')
+        for __ in range(order):
+            firsts.append(_sint(data[byteOffset:byteOffset+numOctets]))
+            byteOffset += numOctets
+        minimum = _sint(data[byteOffset:byteOffset+numOctets])
+        byteOffset += numOctets
+
+    # ---- the group references, widths, and lengths, each starts at a byte
+    def readGroupValues(numBitsEach):
+        nonlocal byteOffset
+        values = _readBits(data, byteOffset * 8 + np.arange(numGroups) * numBitsEach, numBitsEach)
+        byteOffset += (numGroups * numBitsEach + 7) // 8
+        return values.astype(np.int64)
+
+    groupReferences = readGroupValues(numBits)
+    groupWidths = readGroupValues(widthBits) + widthReference
+    groupLengths = readGroupValues(lengthBits) * lengthIncrement + lengthReference
+    if numGroups:
+        groupLengths[-1] = lastLength
+    if np.sum(groupLengths) != numValues:
+        raise ValueError(f'the group lengths ({np.sum(groupLengths)}) != {numValues=}')
+
+    # ---- the values of each group
+    widths = np.repeat(groupWidths, groupLengths)
+    positions = byteOffset * 8 + np.concatenate(([0], np.cumsum(widths)[:-1]))
+    packed = _readBits(data, positions, widths).astype(np.int64)
+    references = np.repeat(groupReferences, groupLengths)
+
+    isMissing = np.zeros(numValues, dtype=bool)
+    if missingManagement in [1, 2]:  # all bits set: primary missing, all but the last: secondary
+        for offset in range(1, missingManagement + 1):
+            isMissing |= np.where(
+                widths > 0,
+                packed == (1 << widths) - offset,
+                references == (1 << np.int64(numBits)) - offset,
+            )
+    elif missingManagement != 0:
+        raise ValueError(f'{missingManagement=} is not supported')
+
+    packed = (references + packed)[~isMissing]
+
+    # ---- 5.3: integrate the spatial differences
+    if order and packed.size > order:
+        differences = packed[order:] + minimum
+        if order == 1:
+            packed = np.concatenate(([firsts[0]], firsts[0] + np.cumsum(differences)))
+        else:
+            steps = np.cumsum(np.concatenate(([firsts[1] - firsts[0]], differences)))
+            packed = np.concatenate(([firsts[0]], firsts[0] + np.cumsum(steps)))
+    elif order:
+        packed = np.array(firsts[:packed.size], dtype=np.int64)
+
+    return packed, isMissing
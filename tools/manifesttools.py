@@ -0,0 +1,87 @@
+'''
+This module keeps a manifest (JSON) of the nc files in a directory,
+so the status of many files can be checked by os.stat only,
+and a file is opened again only if its size or mtime is changed.
+
+    manifest = {
+      'path': {
+        'mtime': st_mtime_ns,
+        'size': st_size,
+        'variables': {varName: shape, ...},
+      },
+      ...
+    }
+'''
+import json
+import os
+
+
+def load(fileName: str) -> dict:
+    '''an empty manifest if the file doesn't exist or is broken'''
+    try:
+        with open(fileName, 'rt') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if not isinstance(manifest, dict):
+        manifest = {}
+    return manifest
+
+
+def save(manifest: dict, fileName: str):
+    '''save the manifest, the entries of the removed files are dropped'''
+    for path in [path for path in manifest if not os.path.exists(path)]:
+        del manifest[path]
+
+    tmpName = f'{fileName}.{os.getpid()}.tmp'  # the cron run and the watcher may save at the same time
+    try:
+        with open(tmpName, 'wt') as f:
+            json.dump(manifest, f, sort_keys=True)
+        os.replace(tmpName, fileName)  # never leave a half-written manifest
+    finally:
+        if os.path.exists(tmpName):
+            os.remove(tmpName)
+
+
+def getEntry(manifest: dict, path: str):
+    '''the entry of path, or None if not recorded, not found, or changed'''
+    entry = manifest.get(path)
+    if entry is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+        return None
+    return entry
+
+
+def updateEntry(manifest: dict, path: str) -> dict:
+    '''
+    open the nc file once and record it,
+    an unreadable (e.g., half-written) file raises OSError or RuntimeError
+    and is not recorded, so it's opened again next time
+    '''
+    from . import nctools as nct
+
+    stat = os.stat(path)
+    try:
+        shapes = nct.getFileInfo(path).shapes
+    except (OSError, RuntimeError):
+        manifest.pop(path, None)
+        raise
+
+    manifest[path] = {
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'variables': {varName: list(shape) for varName, shape in shapes.items()},
+    }
+    return manifest[path]
+
+
+def getOrUpdateEntry(manifest: dict, path: str) -> dict:
+    entry = getEntry(manifest, path)
+    if entry is None:
+        entry = updateEntry(manifest, path)
+    return entry
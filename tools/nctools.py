@@ -7,14 +7,101 @@
       'dimNName': dimN,
     }
 '''
-import netCDF4 as nc
 import numpy as np
 import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+def _nc():  # netCDF4 is slow to import, so it's imported at the first use
+    import netCDF4
+    return netCDF4
+
+
+def __getattr__(name):  # nct.nc is still the netCDF4 module
+    if name == 'nc':
+        return _nc()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+class HandlePool:
+    '''
+    An opt-in pool of opened (read-only) nc files.
+    Inside the context, the reading functions of this module reuse
+    the opened files instead of opening them for every call:
+
+        with nct.HandlePool(maxOpen=256):
+            ...
+
+    At most maxOpen files are kept open, the least recently used
+    ones are closed first. A file is opened again if its mtime or
+    size is changed, and is closed before being written by this module.
+    '''
+
+    def __init__(self, maxOpen: int = 256):
+        self.maxOpen = maxOpen
+        self.handles = OrderedDict()  # path: (stat key, handle), in the LRU order
+
+    def __enter__(self):
+        _pools.append(self)
+        return self
+
+    def __exit__(self, *args):
+        _pools.remove(self)
+        self.close()
+
+    def get(self, fileName):
+        path = os.path.abspath(fileName)
+        stat = os.stat(fileName)
+        statKey = (stat.st_mtime_ns, stat.st_size)
+
+        if path in self.handles:
+            oldStatKey, h = self.handles[path]
+            if oldStatKey == statKey:
+                self.handles.move_to_end(path)
+                return h
+            self.discard(path)  # stale
+
+        h = _nc().Dataset(fileName, 'r')
+        self.handles[path] = (statKey, h)
+        while len(self.handles) > self.maxOpen:
+            __, (__, hOld) = self.handles.popitem(last=False)
+            hOld.close()
+        return h
+
+    def discard(self, fileName):
+        path = os.path.abspath(fileName)
+        if path in self.handles:
+            __, h = self.handles.pop(path)
+            h.close()
+
+    def close(self):
+        while self.handles:
+            __, (__, h) = self.handles.popitem()
+            h.close()
+
+
+_pools = []  # the active HandlePools, the last one is used
+
+
+@contextmanager
+def _openForReading(fileName):
+    if _pools:
+        yield _pools[-1].get(fileName)  # kept open by the pool
+        return
+    with _nc().Dataset(fileName, 'r') as h:
+        yield h
+
+
+def _closePooled(fileName):  # before writing
+    for pool in _pools:
+        pool.discard(fileName)
 
 
 def getVarNames(fileName: str) -> list:
     try:
-        with nc.Dataset(fileName, 'r') as h:
+        with _openForReading(fileName) as h:
             varNames = list(h.variables.keys())
     except Exception as e:
         print(e)
@@ -23,13 +110,13 @@ def getVarNames(fileName: str) -> list:
 
 
 def getDimNames(fileName: str, varName: str) -> list:
-    with nc.Dataset(fileName, 'r') as h:
+    with _openForReading(fileName) as h:
         dimNames = list(h[varName].dimensions)
     return dimNames
 
 def getVarUnits(fileName, varName):
     try:
-        with nc.Dataset(fileName, 'r') as h:
+        with _openForReading(fileName) as h:
             units = h[varName].units
     except Exception as e:
         print(e)
@@ -74,6 +161,11 @@ def _errorIfFileNotExists(fileName):
         raise FileNotFoundError(f'{fileName=}')
 
 
+def _errorIfVariableNotInHandle(h, fileName, varName):
+    if varName not in h.variables:
+        raise ValueError(f'{varName=} not found in {fileName=}')
+
+
 def _errorIfVariableNotExists(fileName, varName):
     _errorIfFileNotExists(fileName)
     if varName not in getVarNames(fileName):
@@ -98,7 +190,7 @@ def errorIfInconsistentExistingVariable(fileName, varStruct):
         return
 
     newShape = varStruct[varName].shape
-    with nc.Dataset(fileName, 'r') as h:
+    with _openForReading(fileName) as h:
         oldDimNames = list(h[varName].dimensions)
         if newDimNames != oldDimNames:
             raise ValueError(
@@ -123,7 +215,7 @@ def errorIfNotASubsetOfTheExistingVariable(fileName, varStruct):
         return
 
     newShape = varStruct[varName].shape
-    with nc.Dataset(fileName, 'r') as h:
+    with _openForReading(fileName) as h:
         oldDimNames = list(h[varName].dimensions)
         if newDimNames != oldDimNames:
             raise ValueError(
@@ -150,7 +242,14 @@ def create(fileName, *varStructs, overwrite=False, use_my_attrs=True, significan
     return
 
 
-def save(fileName, varStruct, overwrite=False, use_my_attrs=True, significant_digits=None):
+def save(
+    fileName, varStruct, overwrite=False, use_my_attrs=True, significant_digits=None,
+    complevel=9, chunksizes=None,
+):
+    '''
+    complevel: zlib compression level (0-9), 0 or None for no compression
+    chunksizes: chunk sizes of the variable, None for the netCDF default
+    '''
 
     if not overwrite:
         if os.path.isfile(fileName):
@@ -180,7 +279,8 @@ def save(fileName, varStruct, overwrite=False, use_my_attrs=True, significant_di
     varvalue = values[0]
     dimvalues = values[1:]
 
-    with nc.Dataset(fileName, 'a') as h_file:
+    _closePooled(fileName)
+    with _nc().Dataset(fileName, 'a') as h_file:
         # check name exists
         existed_names = list(h_file.variables.keys())
 
@@ -201,16 +301,19 @@ def save(fileName, varStruct, overwrite=False, use_my_attrs=True, significant_di
                                 varName} has different dimension names than in the existing file.\n{fileName}')
 
         # create dimensions
+        compression = {'compression': 'zlib', 'complevel': complevel, 'shuffle': True}
+        if not complevel:
+            compression = {'compression': None}
         for name, value in zip([*dimnames, varName], [*dimvalues, varvalue]):
             if name in existed_names:
                 continue
             if name in dimnames:
                 h_file.createDimension(name, len(value))
                 h_file.createVariable(
-                    name, np.float32, (name,), significant_digits=significant_digits, compression='zlib', complevel=9, shuffle=True)
+                    name, np.float32, (name,), significant_digits=significant_digits, **compression)
             if name == varName:
                 h_file.createVariable(
-                    name, np.float32, dimnames, significant_digits=significant_digits, compression='zlib', complevel=9, shuffle=True)
+                    name, np.float32, dimnames, significant_digits=significant_digits, chunksizes=chunksizes, **compression)
 
         # write values
         for n, v in zip(dimnames, dimvalues):
@@ -274,7 +377,8 @@ def set_my_attrs(h_file, dimnames):
 
 
 def ncwriteatt(path, varName, attName, attValue):
-    with nc.Dataset(path, 'a') as h_file:
+    _closePooled(path)
+    with _nc().Dataset(path, 'a') as h_file:
         if varName == '/':
             h_file.setncattr(attName, attValue)
         else:
@@ -283,7 +387,7 @@ def ncwriteatt(path, varName, attName, attValue):
 
 
 def read(fileName, varName):
-    with nc.Dataset(fileName, 'r') as h:
+    with _openForReading(fileName) as h:
         data = h[varName][:]
     return data
 
@@ -293,11 +397,96 @@ def getVarShape(fileName, varName):
         return None
     if varName not in getVarNames(fileName):
         return None
-    with nc.Dataset(fileName, 'r') as h:
+    with _openForReading(fileName) as h:
         shape = h[varName].shape
     return shape
 
 
+class _FileMemo:
+    '''
+    Values memoized for files, by the keys (path, ...).
+    An entry is replaced when the mtime or size of the file is changed,
+    and at most maxSize entries are kept, the least recently used
+    ones are dropped first (as HandlePool).
+    '''
+
+    def __init__(self, maxSize: int):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()  # key: (stat key, value), in the LRU order
+
+    @staticmethod
+    def getKeys(fileName, *names):
+        '''(key, stat key) of the file'''
+        stat = os.stat(fileName)
+        return (os.path.abspath(fileName), *names), (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, key, statKey):
+        '''the value, or None if not memoized or the file is changed'''
+        if key not in self.entries or self.entries[key][0] != statKey:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key][1]
+
+    def set(self, key, statKey, value):
+        self.entries[key] = (statKey, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+
+class NcFileInfo:
+    '''
+    The metadata of a nc file, read with a single open.
+        varNames: [varName, ...]
+        dimNames: {varName: [dimName, ...]}
+        shapes: {varName: shape}
+        units: {varName: units} (None if not set)
+        coords: {dimName: values} of the 1-d coordinate variables
+    '''
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        with _openForReading(fileName) as h:
+            self.varNames = list(h.variables.keys())
+            self.dimNames = {vn: list(h[vn].dimensions) for vn in self.varNames}
+            self.shapes = {vn: h[vn].shape for vn in self.varNames}
+            self.units = {
+                vn: h[vn].units if 'units' in h[vn].ncattrs() else None
+                for vn in self.varNames
+            }
+            self.coords = {
+                vn: np.array(h[vn][:]) for vn in self.varNames
+                if self.dimNames[vn] == [vn]
+            }
+
+    def getVarShape(self, varName):
+        return self.shapes.get(varName)
+
+    def getVarDimLength(self, varName, iDim):
+        shape = self.getVarShape(varName)
+        if shape is None:
+            return 0
+        if len(shape)-1 < iDim:
+            return 0
+        return shape[iDim]
+
+
+_fileInfos = _FileMemo(maxSize=2048)  # memoized NcFileInfo by path
+
+
+def getFileInfo(fileName: str) -> NcFileInfo:
+    '''the NcFileInfo of the file, opened again only if the file is changed'''
+    key, statKey = _FileMemo.getKeys(fileName)
+    fileInfo = _fileInfos.get(key, statKey)
+    if fileInfo is None:
+        fileInfo = _fileInfos.set(key, statKey, NcFileInfo(fileName))
+    return fileInfo
+
+
 def getVarDimLength(fileName, varName, iDim):
     shape = getVarShape(fileName, varName)
     if shape is None:
@@ -308,7 +497,7 @@ def getVarDimLength(fileName, varName, iDim):
 
 
 def ncreadattt(fileName: str, varName: str, attName: str) -> str:
-    with nc.Dataset(fileName, 'r') as hFile:
+    with _openForReading(fileName) as hFile:
         if varName == '/':
             hVar = hFile
         else:
@@ -317,14 +506,36 @@ def ncreadattt(fileName: str, varName: str, attName: str) -> str:
     return attValue
 
 
+_decodedTimes = _FileMemo(maxSize=2048)  # memoized ncreadtime by (path, varName, attName)
+
+
+def _readDecodedTime(h, fileName, varName, attName):  # decoded by the opened h if not memoized
+    key, statKey = _FileMemo.getKeys(fileName, varName, attName)
+    decodedTime = _decodedTimes.get(key, statKey)
+    if decodedTime is None:
+        decodedTime = _decodedTimes.set(
+            key, statKey, ncdecodetime(h[varName][:], h[varName].getncattr(attName))
+        )
+    return decodedTime.copy()
+
+
 def ncreadtime(
     fileName: str, varName: str = 'time', attName: str = 'units'
 ) -> np.array:
+    '''the decoded time, the file is read again only if it's changed'''
+    decodedTime = _decodedTimes.get(*_FileMemo.getKeys(fileName, varName, attName))
+    if decodedTime is not None:
+        return decodedTime.copy()
+
+    with _openForReading(fileName) as h:
+        return _readDecodedTime(h, fileName, varName, attName)
 
+
+def ncdecodetime(timeValue, timeUnits: str) -> np.array:
+    '''decode the time values by the units, e.g., "days since 2000-01-01"'''
     from . import timetools as tt
 
-    timeValue = read(fileName, varName)
-    timeUnits = ncreadattt(fileName, varName, attName).lower()
+    timeUnits = timeUnits.lower()
 
     # timeUnits = "{timeDelta}{delimitter}since{delimitter}{timeOrigin}"
     # parse time units -> timeDelta & timeOrigin
@@ -362,40 +573,59 @@ def ncreadtime(
     if strTimeDelta not in [*TIMEDELTA.keys(), *STRMONTH, *STRYEAR]:
         raise ValueError(f'unalbe to recognize {strTimeDelta=}')
 
+    timeValue = np.asarray(timeValue)
     if strTimeDelta in STRMONTH:
-        time = [tt.addMonth(timeOrigin, v) for v in timeValue]
+        return _addMonths(timeOrigin, timeValue)
     elif strTimeDelta in STRYEAR:
-        time = [tt.addMonth(timeOrigin, v*12) for v in timeValue]
+        return _addMonths(timeOrigin, timeValue*12)
     else:
-        time = [timeOrigin + v*TIMEDELTA[strTimeDelta] for v in timeValue]
+        return np.array(timeOrigin + timeValue*TIMEDELTA[strTimeDelta])
 
-    return np.array(time)
 
+def _addMonths(timeOrigin, deltas):
+    '''
+    tt.addMonth(timeOrigin, delta) for each delta, by numpy.datetime64 months,
+    the day is limited to the last day of the month
+    '''
+    from . import timetools as tt
 
-def ncread(fileName: str, varName: str, slices: list[slice] = None) -> np.array:
+    if not np.all(np.mod(deltas, 1) == 0):  # addMonth only accepts whole months
+        return np.array([tt.addMonth(timeOrigin, delta) for delta in deltas.tolist()])
+
+    y, m, d = tt.float2ymd(timeOrigin)
+    months = np.datetime64(f'{y:04d}-{m:02d}', 'M') + deltas.astype(np.int64)
+    days = np.minimum(d, (months + 1).astype('datetime64[D]') - months.astype('datetime64[D]'))
+    if np.any(days.astype(int) < d):
+        print(f'Warning (addmonth): day {d} is changed to the end of the month for some months')
+
+    dates = months.astype('datetime64[D]') + (days.astype(int) - 1)
+    return (dates - np.datetime64('2000-01-01', 'D')).astype(int) + timeOrigin % 1
 
-    _errorIfVariableNotExists(fileName, varName)
+
+def ncread(fileName: str, varName: str, slices: list[slice] = None) -> np.array:
 
     # ---- checking slices ---- #
     if (slices is not None) and (not isinstance(slices, list)):
         raise TypeError('"slices" must be the list type')
 
     if slices is not None:
-
         for s in slices:
             if not isinstance(s, slice):
                 raise TypeError('elements in "slices" must be the slice type.')
 
-        with nc.Dataset(fileName, 'r') as h:
+    # ---- read file (a single open for checking and reading) ---- #
+    _errorIfFileNotExists(fileName)
+    with _openForReading(fileName) as h:
+        _errorIfVariableNotInHandle(h, fileName, varName)
+
+        if slices is not None:
             ndim = h[varName].ndim
-        if len(slices) != ndim:
-            raise ValueError(
-                f'The number of inquired dimensions (n={len(slices)}) '
-                f'are different from the file (n={ndim}).'
-            )
+            if len(slices) != ndim:
+                raise ValueError(
+                    f'The number of inquired dimensions (n={len(slices)}) '
+                    f'are different from the file (n={ndim}).'
+                )
 
-    # ---- read file ---- #
-    with nc.Dataset(fileName, 'r') as h:
         if slices is None:
             data = h[varName][:]
         else:
@@ -404,18 +634,103 @@ def ncread(fileName: str, varName: str, slices: list[slice] = None) -> np.array:
     return np.array(data)
 
 
+PREFETCHMAXSIZE = 64 * 1024**2  # bytes, larger files are not prefetched by ncreadBatch
+
+
+def ncreadBatch(
+    requests: list[tuple], numWorkers: int = 8,
+    cache: OrderedDict = None, maxCached: int = 1024,
+) -> np.array:
+    '''
+    read requests = [(fileName, varName, index), ...], i.e.,
+    the slab h[varName][index, ...] of each file, into a stacked
+    (len(requests), ...) array (float64, in the order of requests)
+
+    The requests are grouped by file, so each file is opened once.
+    netCDF4 (HDF5) is not thread-safe, so the numWorkers threads only
+    prefetch the files into the OS page cache to overlap the filesystem
+    latency, while the netCDF reads are done by the calling thread,
+    file by file as their prefetches are done.
+
+    If cache (an OrderedDict kept by the caller) is given, the slabs read
+    by the previous calls are reused if their files are unchanged, and
+    at most maxCached slabs are kept (the least recently used are dropped).
+    '''
+    output = None
+
+    def fill(iRequest, data):
+        nonlocal output
+        if output is None:
+            output = np.nan * np.ones((len(requests), *data.shape))
+        output[iRequest, :] = data
+
+    groups = {}  # (fileName, varName): [(iRequest, index, cacheKey), ...]
+    for iRequest, (fileName, varName, index) in enumerate(requests):
+        _errorIfFileNotExists(fileName)
+        cacheKey = None
+        if cache is not None:
+            stat = os.stat(fileName)
+            cacheKey = (os.path.abspath(fileName), stat.st_mtime_ns, stat.st_size, varName, index)
+            if cacheKey in cache:
+                cache.move_to_end(cacheKey)
+                fill(iRequest, cache[cacheKey])
+                continue
+        groups.setdefault((fileName, varName), []).append((iRequest, index, cacheKey))
+
+    with ThreadPoolExecutor(max_workers=max(numWorkers, 1)) as executor:
+        prefetches = {
+            fileName: executor.submit(_prefetch, fileName)
+            for fileName in dict.fromkeys(fileName for fileName, __ in groups)
+        }
+        for (fileName, varName), items in groups.items():
+            prefetches[fileName].result()
+            with _openForReading(fileName) as h:
+                _errorIfVariableNotInHandle(h, fileName, varName)
+                for iRequest, index, cacheKey in items:
+                    data = np.array(h[varName][index, ...])
+                    fill(iRequest, data)
+                    if cache is not None:
+                        cache[cacheKey] = data
+
+    if cache is not None:
+        while len(cache) > maxCached:
+            cache.popitem(last=False)
+
+    if output is None:
+        raise ValueError('no requests to read')
+    return output
+
+
+def _prefetch(fileName):
+    if os.path.getsize(fileName) > PREFETCHMAXSIZE:
+        return
+    with open(fileName, 'rb') as f:
+        while f.read(4 * 1024**2):
+            pass
+
+
+_increasingDims = _FileMemo(maxSize=8192)  # (path, dimName): True of the (flipped) dimensions checked to be increasing
+
+
 def ncreadByDimRange(
     fileName: str, varName: str, minMaxs: list[list],
     iDimT: int = None, decodeTime=True
 ):
+    #
+    # ---- a single open for checking, reading the dimensions, and reading the data
+    _errorIfFileNotExists(fileName)
+    with _openForReading(fileName) as h:
+        return _ncreadByDimRange(h, fileName, varName, minMaxs, iDimT, decodeTime)
+
+
+def _ncreadByDimRange(h, fileName, varName, minMaxs, iDimT, decodeTime):
     from .caltools import value2Slice
 
     #
-    # ---- check file can be opened
-    _errorIfVariableNotExists(fileName, varName)
-    with nc.Dataset(fileName, 'r') as h:
-        NDIM = h[varName].ndim
-    dimNames = getDimNames(fileName, varName)
+    # ---- check the variable
+    _errorIfVariableNotInHandle(h, fileName, varName)
+    NDIM = h[varName].ndim
+    dimNames = list(h[varName].dimensions)
 
     #
     # ---- checking input types 
@@ -477,9 +792,9 @@ def ncreadByDimRange(
     #
     # ---- get slices for dimensions ---- #
     dimensions = [  # read dimensions
-        read(fileName, dimName) # general dimensions
+        h[dimName][:] # general dimensions
         if (iDim != iDimT) or (not decodeTime)
-        else ncreadtime(fileName, dimName) # time dimension
+        else _readDecodedTime(h, fileName, dimName, 'units') # time dimension
         for iDim, dimName in enumerate(dimNames)
     ]
 
@@ -490,10 +805,13 @@ def ncreadByDimRange(
         for dimension in dimensions
     ])
 
+    increasingKeys = [_FileMemo.getKeys(fileName, dimName) for dimName in dimNames]
     slicesFlipped = [ # determine the slice by minMaxs
-        value2Slice(dimension, *minMax)
-        for dimension, minMax in zip(dimensionsFlipped, minMaxs)
+        value2Slice(dimension, *minMax, checkIncreasing=not _increasingDims.get(*keys))
+        for dimension, minMax, keys in zip(dimensionsFlipped, minMaxs, increasingKeys)
     ]
+    for keys in increasingKeys:  # checked by value2Slice
+        _increasingDims.set(*keys, True)
 
     dimensionsFlipped = [
         np.array(dim[sli]) 
@@ -510,9 +828,8 @@ def ncreadByDimRange(
     dimensions = [np.array(dim[sli]) for sli, dim in zip(slices, dimensions)]
 
     # read variable
-    with nc.Dataset(fileName, 'r') as h:
-        data = h[varName][slices]
-    
+    data = h[varName][slices]
+
     data = np.array(data)
     data = np.flip(data, axis=[iax for iax, rev in enumerate(dimsAreReversed) if rev])
 
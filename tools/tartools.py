@@ -0,0 +1,149 @@
+'''
+This module reads the members of (uncompressed) tar archives
+without untarring the whole archive.
+
+The member headers are scanned once to index where the data of each
+member is located in the archive, then the needed members can be
+read (or streamed) straight from the archive by seeking.
+
+    index = {
+      'memberBaseName': {
+        'name': member name in the archive,
+        'offset': byte offset of the member data in the archive,
+        'size': byte size of the member data,
+      },
+      ...
+    }
+'''
+import tarfile
+import threading
+import os
+from collections import OrderedDict
+
+
+CHUNKSIZE = 16 * 1024 * 1024  # bytes for copying
+
+
+def indexTar(fileName: str) -> dict:
+    '''index the regular file members of the archive by their base names'''
+    index = {}
+    with tarfile.open(fileName, 'r:') as hTar:  # "r:" -> no compression, so offsets are valid
+        for member in hTar:
+            if not member.isfile() or member.sparse is not None:
+                continue
+            index[os.path.basename(member.name)] = {
+                'name': member.name,
+                'offset': member.offset_data,
+                'size': member.size,
+            }
+    return index
+
+
+def getMemberRange(fileName: str, memberName: str, index: dict = None) -> tuple:
+    '''return (offset, size) of the member data in the archive'''
+    if index is None:
+        index = indexTar(fileName)
+    if memberName not in index:
+        raise FileNotFoundError(f'{memberName=} not found in {fileName=}')
+    member = index[memberName]
+    return member['offset'], member['size']
+
+
+def _copyRange(hSrc, hDes, offset, size):
+    hSrc.seek(offset)
+    remains = size
+    while remains > 0:
+        chunk = hSrc.read(min(CHUNKSIZE, remains))
+        if not chunk:
+            raise EOFError(f'unexpected end of archive, {remains} bytes missing')
+        hDes.write(chunk)
+        remains -= len(chunk)
+
+
+class TarCache:
+    '''
+    A per-run cache of the tar indices and the extracted members,
+    so a member is never indexed or extracted twice in a run.
+
+    The archives are identified by (real path, size, mtime),
+    so a modified archive is indexed again (and its older version dropped).
+    The extracted members are kept in cacheDir until their total size
+    exceeds quota (bytes), then the least recently used ones are removed.
+    The members are handed out as hard links, so removing them from
+    the cache doesn't affect the files in use.
+    '''
+
+    def __init__(self, cacheDir: str, quota: int):
+        self.cacheDir = cacheDir
+        self.quota = quota
+        self.indices = {}
+        self.members = OrderedDict()  # memberKey: (path, size), in the LRU order
+        self.totalSize = 0
+        self.numExtracted = 0
+        self._lock = threading.Lock()
+        self._keyLocks = {}
+
+    def _getKey(self, fileName):
+        stat = os.stat(fileName)
+        return os.path.realpath(fileName), stat.st_size, stat.st_mtime_ns
+
+    def _getKeyLock(self, key):
+        with self._lock:
+            return self._keyLocks.setdefault(key, threading.Lock())
+
+    def getIndex(self, fileName: str) -> dict:
+        key = self._getKey(fileName)
+        with self._getKeyLock(key):
+            if key not in self.indices:
+                self._dropStale(key)
+                self.indices[key] = indexTar(fileName)
+            return self.indices[key]
+
+    def _dropStale(self, key):
+        '''drop the index, members and locks of the other versions of the archive of key'''
+        with self._lock:
+            for staleKey in [k for k in self.indices if k[0] == key[0] and k != key]:
+                del self.indices[staleKey]
+            for staleKey in [k for k in self.members if k[0] == key[0] and k[:3] != key]:
+                path, size = self.members.pop(staleKey)
+                os.remove(path)
+                self.totalSize -= size
+            for staleKey in [k for k in self._keyLocks if k[0] == key[0] and k[:3] != key]:
+                del self._keyLocks[staleKey]
+
+    def linkMember(self, fileName: str, memberName: str, desPath: str):
+        '''make desPath a hard link to the (cached) member of the archive'''
+        key = (*self._getKey(fileName), memberName)
+        with self._getKeyLock(key):
+            with self._lock:  # linking under the lock, so it won't be evicted in between
+                if key in self.members:
+                    self.members.move_to_end(key)
+                    os.link(self.members[key][0], desPath)
+                    return
+
+                self.numExtracted += 1
+                # cacheDir can be shared by processes (e.g., forked workers), so the names are per process
+                cachePath = f'{self.cacheDir}/{os.getpid()}.{self.numExtracted}_{memberName}'
+
+            index = self.getIndex(fileName)
+            os.makedirs(self.cacheDir, exist_ok=True)
+            tmpName = f'{self.cacheDir}/.{os.path.basename(cachePath)}.tmp'
+            try:  # no partial member left in the cache
+                with open(fileName, 'rb') as hSrc, open(tmpName, 'wb') as hDes:
+                    _copyRange(hSrc, hDes, *getMemberRange(fileName, memberName, index))
+                os.replace(tmpName, cachePath)
+            finally:
+                if os.path.exists(tmpName):  # failed before the rename
+                    os.remove(tmpName)
+
+            with self._lock:
+                self.members[key] = (cachePath, os.path.getsize(cachePath))
+                self.totalSize += self.members[key][1]
+                os.link(cachePath, desPath)
+                self._evict()
+
+    def _evict(self):  # called with self._lock held
+        while self.totalSize > self.quota and len(self.members) > 1:
+            __, (path, size) = self.members.popitem(last=False)
+            os.remove(path)
+            self.totalSize -= size
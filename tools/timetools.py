@@ -10,7 +10,13 @@ That is,
 from datetime import datetime, timedelta
 from calendar import isleap as cisleap
 from math import isnan, isinf, floor
-from dateutil.parser import parse as parseDate
+from functools import lru_cache
+import re
+
+
+def _np():  # numpy is only needed by the array functions, imported at the first use
+    import numpy
+    return numpy
 
 
 def example():
@@ -47,10 +53,12 @@ def example():
 
 def _origin(): return datetime(2000, 1, 1)
 
-def _float2datetime(f):
+@lru_cache(maxsize=65536)  # the same dates are converted many times, e.g., by the path builders
+def _float2datetimeCached(f):
     if isinf(f) | isnan(f):
         return f
     return _origin() + timedelta(days=f)
+def _float2datetime(f): return _float2datetimeCached(float(f))  # hashable, e.g., for a 0-d array
 
 
 def datetime2float(d): return (d - _origin()).total_seconds()/86400
@@ -62,11 +70,15 @@ def now(): return datetime2float(datetime.now())
 def today(): return floor(datetime2float(datetime.today()))
 
 
-def float2format(f, fmt='%Y%m%d'): return _float2datetime(float(f)).strftime(fmt)
+@lru_cache(maxsize=65536)
+def _float2format(f, fmt): return _float2datetime(f).strftime(fmt)
+def float2format(f, fmt='%Y%m%d'): return _float2format(float(f), fmt)
 def format2float(s, fmt): return datetime2float(format2datetime(s, fmt))
 def format2datetime(s, fmt): return datetime.strptime(s, fmt)
-def string2datetime(s): return parseDate(s)
-def string2float(s): return datetime2float(parseDate(s))
+def string2datetime(s):
+    from dateutil.parser import parse as parseDate  # imported only when needed (slow)
+    return parseDate(s)
+def string2float(s): return datetime2float(string2datetime(s))
 
 def addMonth(f0, delta=1, warning=True):
     y, m, d = year(f0), month(f0)+delta, day(f0)
@@ -133,4 +145,80 @@ def yearIsLeap(year): return cisleap(year)
 
 def dayOfClim(f):
     __, m, d, remains = *float2ymd(f), f % 1
-    return ymd2float(2000, m, d) - ymd2float(2000, 1, 1) + remains
\ No newline at end of file
+    return ymd2float(2000, m, d) - ymd2float(2000, 1, 1) + remains
+
+
+# ---- array versions: array in, array out (the same shape), by numpy.datetime64
+# only for finite values, the fraction of days is rounded to microseconds as _float2datetime
+def _float2datetime64(f):
+    np = _np()
+    f = np.asarray(f, dtype=float)
+    if not np.all(np.isfinite(f)):
+        raise ValueError('nan or inf cannot be converted to dates')
+    microseconds = np.round(f * 86400e6).astype(np.int64).astype('timedelta64[us]')
+    return np.datetime64('2000-01-01', 'us') + microseconds
+
+
+def _fieldArrays(f):  # {strftime directive: integer array}
+    t = _float2datetime64(f)
+    year, month, day = [t.astype(f'datetime64[{unit}]') for unit in 'YMD']
+    fields = {
+        '%Y': year.astype(int) + 1970,
+        '%m': month.astype(int) % 12 + 1,
+        '%d': (day - month).astype(int) + 1,
+        '%j': (day - year).astype(int) + 1,
+        '%H': (t - day).astype('timedelta64[h]').astype(int),
+        '%M': (t - day).astype('timedelta64[m]').astype(int) % 60,
+        '%S': (t - day).astype('timedelta64[s]').astype(int) % 60,
+    }
+    fields['%y'] = fields['%Y'] % 100
+    return fields
+
+
+def yearArray(f): return _fieldArrays(f)['%Y']
+def monthArray(f): return _fieldArrays(f)['%m']
+def dayArray(f): return _fieldArrays(f)['%d']
+def dayOfYearArray(f): return _fieldArrays(f)['%j']
+def isleapArray(f):
+    year = yearArray(f)
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+def dayOfYear229Array(f):
+    fields = _fieldArrays(f)
+    year, doy = fields['%Y'], fields['%j']
+    isleap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return doy + ((doy > 31 + 28) & ~isleap)  # skipped 229
+
+
+_FIELDFORMATS = {
+    '%Y': '04d', '%m': '02d', '%d': '02d', '%y': '02d',
+    '%j': '03d', '%H': '02d', '%M': '02d', '%S': '02d',
+}
+
+
+def float2formatArray(f, fmt='%Y%m%d'):
+    '''
+    the array of float2format(f, fmt) for each element of f,
+    formatted one by one by float2format if fmt has the directives
+    other than %Y %m %d %y %j %H %M %S %%
+    '''
+    np = _np()
+    f = np.asarray(f, dtype=float)
+    if any([d not in _FIELDFORMATS and d != '%%' for d in re.findall(r'%.', fmt)]):
+        strings = [float2format(value, fmt) for value in f.ravel().tolist()]
+        return np.array(strings, dtype=str).reshape(f.shape)
+
+    # e.g., 'data/%Y/%y%m%d.nc' -> 'data/{0:04d}/{1:02d}{2:02d}{3:02d}.nc'
+    directives = []
+    def toField(match):
+        if match.group() == '%%':
+            return '%'
+        directives.append(match.group())
+        return f'{{{len(directives)-1}:{_FIELDFORMATS[match.group()]}}}'
+    template = re.sub(r'%.', toField, fmt.replace('{', '{{').replace('}', '}}'))
+
+    fields = _fieldArrays(f)
+    strings = [
+        template.format(*values)
+        for values in zip(*[fields[d].ravel().tolist() for d in directives])
+    ] if directives else [template] * f.size
+    return np.array(strings, dtype=str).reshape(f.shape)